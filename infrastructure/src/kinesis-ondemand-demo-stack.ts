@@ -771,6 +771,8 @@ def lambda_handler(event, context):
               effect: iam.Effect.ALLOW,
               actions: [
                 'bedrock:InvokeModel',
+                // converse_stream (BEDROCK_STREAMING=true)
+                'bedrock:InvokeModelWithResponseStream',
               ],
               resources: [
                 // Allow inference profile to route to any of the three US regions
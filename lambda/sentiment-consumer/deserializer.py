@@ -11,6 +11,13 @@ import json
 import logging
 from typing import Any, Dict, Optional
 
+# orjson ships in the Lambda layer; fall back to the standard library for local runs
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 # Import from shared module (available in Lambda environment)
 import sys
 import os
@@ -18,7 +25,7 @@ import os
 # Add parent directory to path to import shared modules
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../'))
 
-from shared.serialization import post_from_bytes
+from shared.serialization import post_from_dict
 from shared.models import SocialMediaPost
 
 # Configure logging
@@ -92,8 +99,8 @@ class RecordDeserializer:
             encoded_data = kinesis_data.get('data')
             if not encoded_data:
                 logger.error(
-                    f"Missing 'data' field in Kinesis record. "
-                    f"Sequence number: {sequence_number}"
+                    "Missing 'data' field in Kinesis record. "
+                    "Sequence number: %s", sequence_number
                 )
                 return None
             
@@ -102,33 +109,33 @@ class RecordDeserializer:
                 decoded_bytes = base64.b64decode(encoded_data)
             except Exception as e:
                 logger.error(
-                    f"Failed to decode base64 data. "
-                    f"Sequence number: {sequence_number}, Error: {e}"
+                    "Failed to decode base64 data. "
+                    "Sequence number: %s, Error: %s", sequence_number, e
                 )
                 return None
             
-            # Deserialize bytes to SocialMediaPost using shared utilities
+            # Parse the UTF-8 JSON bytes directly and build the post using shared utilities
             try:
-                post = post_from_bytes(decoded_bytes)
+                post = post_from_dict(_json_loads(decoded_bytes))
                 logger.debug(
-                    f"Successfully deserialized record. "
-                    f"Sequence number: {sequence_number}, Post ID: {post.id}"
+                    "Successfully deserialized record. "
+                    "Sequence number: %s, Post ID: %s", sequence_number, post.id
                 )
                 return post
                 
             except ValueError as e:
                 # This catches JSON parsing errors and validation errors
                 logger.error(
-                    f"Failed to deserialize post from bytes. "
-                    f"Sequence number: {sequence_number}, Error: {e}"
+                    "Failed to deserialize post from bytes. "
+                    "Sequence number: %s, Error: %s", sequence_number, e
                 )
                 return None
                 
         except Exception as e:
             # Catch any unexpected errors
             logger.error(
-                f"Unexpected error during deserialization. "
-                f"Sequence number: {sequence_number}, Error: {e}",
+                "Unexpected error during deserialization. "
+                "Sequence number: %s, Error: %s", sequence_number, e,
                 exc_info=True
             )
             return None
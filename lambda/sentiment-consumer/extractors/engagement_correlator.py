@@ -62,8 +62,9 @@ class EngagementSentimentCorrelator:
         self.high_engagement_threshold = high_engagement_threshold
         self.low_engagement_threshold = low_engagement_threshold
         logger.info(
-            f"Initialized EngagementSentimentCorrelator with "
-            f"high_threshold={high_engagement_threshold}, low_threshold={low_engagement_threshold}"
+            "Initialized EngagementSentimentCorrelator with "
+            "high_threshold=%s, low_threshold=%s",
+            high_engagement_threshold, low_engagement_threshold
         )
     
     def extract_insights(
@@ -92,8 +93,9 @@ class EngagementSentimentCorrelator:
         """
         if len(posts) != len(sentiments):
             logger.warning(
-                f"Posts and sentiments count mismatch: {len(posts)} posts, "
-                f"{len(sentiments)} sentiments. Will process available data."
+                "Posts and sentiments count mismatch: %d posts, "
+                "%d sentiments. Will process available data.",
+                len(posts), len(sentiments)
             )
         
         if not posts:
@@ -128,7 +130,7 @@ class EngagementSentimentCorrelator:
             # Get sentiment for this post
             sentiment = sentiment_map.get(post.id)
             if not sentiment:
-                logger.warning(f"No sentiment found for post {post.id}")
+                logger.warning("No sentiment found for post %s", post.id)
                 continue
             
             engagement = post.engagement_score
@@ -182,10 +184,10 @@ class EngagementSentimentCorrelator:
         )
         
         logger.info(
-            f"Extracted engagement-sentiment insight: "
-            f"correlation={correlation:.3f}, "
-            f"controversial={len(high_engagement_negative_posts)}, "
-            f"underperforming={len(low_engagement_positive_posts)}"
+            "Extracted engagement-sentiment insight: "
+            "correlation=%.3f, controversial=%d, underperforming=%d",
+            correlation, len(high_engagement_negative_posts),
+            len(low_engagement_positive_posts)
         )
         
         return insight
@@ -246,8 +248,8 @@ class EngagementSentimentCorrelator:
         
         if len(engagements) != len(sentiment_scores):
             logger.warning(
-                f"Engagement and sentiment score count mismatch: "
-                f"{len(engagements)} vs {len(sentiment_scores)}"
+                "Engagement and sentiment score count mismatch: %d vs %d",
+                len(engagements), len(sentiment_scores)
             )
             return 0.0
         
@@ -264,7 +266,7 @@ class EngagementSentimentCorrelator:
             std_engagement = stdev(engagements)
             std_sentiment = stdev(sentiment_scores)
         except Exception as e:
-            logger.warning(f"Failed to calculate standard deviation: {e}")
+            logger.warning("Failed to calculate standard deviation: %s", e)
             return 0.0
         
         # If either standard deviation is zero, correlation is undefined
@@ -68,8 +68,9 @@ class GeographicSentimentAnalyzer:
         """
         if len(posts) != len(sentiments):
             logger.warning(
-                f"Posts and sentiments count mismatch: {len(posts)} posts, "
-                f"{len(sentiments)} sentiments. Will process available data."
+                "Posts and sentiments count mismatch: %d posts, "
+                "%d sentiments. Will process available data.",
+                len(posts), len(sentiments)
             )
         
         if not posts:
@@ -92,7 +93,7 @@ class GeographicSentimentAnalyzer:
             # Get sentiment for this post
             sentiment = sentiment_map.get(post.id)
             if not sentiment:
-                logger.warning(f"No sentiment found for post {post.id}")
+                logger.warning("No sentiment found for post %s", post.id)
                 continue
             
             # Extract location data
@@ -139,7 +140,7 @@ class GeographicSentimentAnalyzer:
             )
             insights.append(insight)
         
-        logger.info(f"Extracted insights for {len(insights)} geographic regions")
+        logger.info("Extracted insights for %d geographic regions", len(insights))
         return insights
     
     def _extract_location(self, post: any) -> tuple:
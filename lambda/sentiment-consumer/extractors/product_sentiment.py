@@ -107,8 +107,9 @@ class ProductSentimentExtractor:
         """
         if len(posts) != len(sentiments):
             logger.warning(
-                f"Posts and sentiments count mismatch: {len(posts)} posts, "
-                f"{len(sentiments)} sentiments. Will process available data."
+                "Posts and sentiments count mismatch: %d posts, "
+                "%d sentiments. Will process available data.",
+                len(posts), len(sentiments)
             )
         
         if not posts:
@@ -132,7 +133,7 @@ class ProductSentimentExtractor:
             # Get sentiment for this post
             sentiment = sentiment_map.get(post.id)
             if not sentiment:
-                logger.warning(f"No sentiment found for post {post.id}")
+                logger.warning("No sentiment found for post %s", post.id)
                 continue
             
             # Extract product names from this post
@@ -180,7 +181,7 @@ class ProductSentimentExtractor:
             )
             insights.append(insight)
         
-        logger.info(f"Extracted insights for {len(insights)} products")
+        logger.info("Extracted insights for %d products", len(insights))
         return insights
     
     def _extract_product_names(self, post: any) -> Set[str]:
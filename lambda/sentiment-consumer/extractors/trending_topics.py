@@ -46,7 +46,7 @@ class TrendingTopicsExtractor:
             trending_threshold: Minimum posts for trending classification (default: 10)
         """
         self.trending_threshold = trending_threshold
-        logger.info(f"Initialized TrendingTopicsExtractor with threshold={trending_threshold}")
+        logger.info("Initialized TrendingTopicsExtractor with threshold=%s", trending_threshold)
     
     def extract_insights(
         self,
@@ -74,8 +74,9 @@ class TrendingTopicsExtractor:
         """
         if len(posts) != len(sentiments):
             logger.warning(
-                f"Posts and sentiments count mismatch: {len(posts)} posts, "
-                f"{len(sentiments)} sentiments. Will process available data."
+                "Posts and sentiments count mismatch: %d posts, "
+                "%d sentiments. Will process available data.",
+                len(posts), len(sentiments)
             )
         
         if not posts:
@@ -99,7 +100,7 @@ class TrendingTopicsExtractor:
             # Get sentiment for this post
             sentiment = sentiment_map.get(post.id)
             if not sentiment:
-                logger.warning(f"No sentiment found for post {post.id}")
+                logger.warning("No sentiment found for post %s", post.id)
                 continue
             
             # Get hashtags from this post (clean them)
@@ -151,10 +152,11 @@ class TrendingTopicsExtractor:
             )
             insights.append(insight)
         
-        logger.info(
-            f"Extracted insights for {len(insights)} hashtags "
-            f"({sum(1 for i in insights if i.is_trending)} trending)"
-        )
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "Extracted insights for %d hashtags (%d trending)",
+                len(insights), sum(1 for i in insights if i.is_trending)
+            )
         return insights
     
     def _clean_hashtags(self, hashtags: List[str]) -> Set[str]:
@@ -8,20 +8,23 @@ insights, and publishes results to CloudWatch Logs.
 
 import os
 import json
+import asyncio
 import time
 import uuid
 import logging
-from typing import Dict, Any, List, Optional
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
+from datetime import datetime, timezone
 
 import boto3
 from botocore.exceptions import ClientError
 
 # Import local modules
 from deserializer import RecordDeserializer
-from sentiment_analyzer import SentimentAnalyzer
+from sentiment_analyzer import SentimentAnalyzer, BEDROCK_CLIENT_CONFIG, get_aio_session
 from cloudwatch_publisher import CloudWatchPublisher
-from models import BatchProcessingMetrics
+from models import BatchProcessingMetrics, set_batch_timestamp, clear_batch_timestamp
 
 # Import extractors
 from extractors.product_sentiment import ProductSentimentExtractor
@@ -33,18 +36,36 @@ from extractors.geographic_analyzer import GeographicSentimentAnalyzer
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# Processing metrics emitted per invocation, in the order their values are
+# passed by emit_processing_metrics
+_PROCESSING_METRIC_TEMPLATES = (
+    {'MetricName': 'ErrorRate', 'Unit': 'Percent'},
+    {'MetricName': 'ProcessingLatency', 'Unit': 'Milliseconds'},
+    {'MetricName': 'BedrockAPICallCount', 'Unit': 'Count'},
+    {'MetricName': 'BedrockAPILatency', 'Unit': 'Milliseconds'},
+    {'MetricName': 'SuccessfulRecords', 'Unit': 'Count'},
+    {'MetricName': 'FailedRecords', 'Unit': 'Count'},
+)
+
 # Initialize AWS clients (reused across invocations)
 bedrock_client = None
 cloudwatch_metrics_client = None
 
+# Thread pool for running the insight extractors (reused across invocations)
+_INSIGHTS_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix='insights')
+
 
 def get_bedrock_client():
     """Get or create Bedrock Runtime client."""
     global bedrock_client
     if bedrock_client is None:
         bedrock_region = os.environ.get('BEDROCK_REGION', 'us-west-2')
-        bedrock_client = boto3.client('bedrock-runtime', region_name=bedrock_region)
-        logger.info(f"Initialized Bedrock client in region: {bedrock_region}")
+        bedrock_client = boto3.client(
+            'bedrock-runtime',
+            region_name=bedrock_region,
+            config=BEDROCK_CLIENT_CONFIG
+        )
+        logger.info("Initialized Bedrock client in region: %s", bedrock_region)
     return bedrock_client
 def get_cloudwatch_metrics_client():
     """Get or create CloudWatch Metrics client."""
@@ -54,13 +75,34 @@ def get_cloudwatch_metrics_client():
     return cloudwatch_metrics_client
 
 
+@lru_cache(maxsize=4)
+def _dims_for(environment: str) -> Tuple[Dict[str, str], ...]:
+    """
+    Get the CloudWatch dimensions shared by all processing metrics.
+    
+    The environment is fixed for the lifetime of a Lambda container, so the
+    dimensions are built once and reused by every warm invocation.
+    
+    Args:
+        environment: Environment name (for metric dimensions)
+        
+    Returns:
+        Tuple of CloudWatch dimension dictionaries
+    """
+    return (
+        {'Name': 'Environment', 'Value': environment},
+        {'Name': 'Component', 'Value': 'SentimentAnalysis'},
+    )
+
+
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     Main Lambda handler for sentiment analysis consumer.
     
     This function processes Kinesis stream records by:
     1. Deserializing records into SocialMediaPost objects
-    2. Analyzing sentiment using Amazon Bedrock Nova Micro (single API call)
+    2. Analyzing sentiment using Amazon Bedrock Nova Micro (single API call by
+       default, or concurrent sub-batch calls when BEDROCK_SUB_BATCH_SIZE is set)
     3. Extracting insights across multiple dimensions
     4. Publishing insights to CloudWatch Metrics
     5. Emitting processing metrics
@@ -74,19 +116,36 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         
     Requirements: 1.3, 2.3, 2.6, 10.4, 10.5, 12.5
     """
+    # Empty polls carry no work: skip client setup and metric emission entirely
+    records = event.get('Records', [])
+    total_records = len(records)
+    if total_records == 0:
+        return _create_response([])
+
     start_time = time.time()
     batch_id = str(uuid.uuid4())
     
-    logger.info(f"Starting sentiment analysis batch processing. Batch ID: {batch_id}")
+    logger.info("Starting sentiment analysis batch processing. Batch ID: %s", batch_id)
     
     # Extract configuration from environment
     model_id = os.environ.get('BEDROCK_MODEL_ID', 'us.amazon.nova-lite-v1:0')
     demo_phase = int(os.environ.get('DEMO_PHASE', '0'))
     environment = os.environ.get('ENVIRONMENT', 'dev')
+    sub_batch_size = int(os.environ.get('BEDROCK_SUB_BATCH_SIZE', '0')) or None
+    stream_response = os.environ.get('BEDROCK_STREAMING', 'false').lower() == 'true'
+    use_async = os.environ.get('BEDROCK_ASYNC', 'false').lower() == 'true'
+    if use_async and get_aio_session is None:
+        logger.warning("BEDROCK_ASYNC is set but aiobotocore is not installed; using threads")
+        use_async = False
     
     # Initialize components
     deserializer = RecordDeserializer()
-    sentiment_analyzer = SentimentAnalyzer(get_bedrock_client(), model_id=model_id)
+    sentiment_analyzer = SentimentAnalyzer(
+        get_bedrock_client(),
+        model_id=model_id,
+        sub_batch_size=sub_batch_size,
+        stream_response=stream_response
+    )
     cloudwatch_publisher = CloudWatchPublisher(
         metrics_client=get_cloudwatch_metrics_client(),
         environment=environment,
@@ -101,21 +160,27 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     geographic_analyzer = GeographicSentimentAnalyzer()
     
     # Track processing metrics
-    total_records = len(event.get('Records', []))
     successful_records = 0
     failed_records = 0
     failed_sequence_numbers = []
+    failed_sequence_set = set()  # Membership sidecar for failed_sequence_numbers
+    all_sequence_numbers = []  # Collected while deserializing for the failure path
     bedrock_total_latency_ms = 0.0
     
+    # Share a single timestamp across all results and insights in this batch
+    set_batch_timestamp(datetime.fromtimestamp(start_time, timezone.utc).replace(tzinfo=None))
+    
     try:
         # Step 1: Deserialize all records
-        logger.info(f"Deserializing {total_records} records")
+        logger.info("Deserializing %d records", total_records)
         posts = []
         post_to_sequence = {}  # Map post_id to sequence number for failure tracking
         
-        for record in event.get('Records', []):
+        for record in records:
             kinesis_data = record.get('kinesis', {})
             sequence_number = kinesis_data.get('sequenceNumber')
+            if sequence_number:
+                all_sequence_numbers.append(sequence_number)
             
             post = deserializer.deserialize_record(record)
             
@@ -127,9 +192,11 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 failed_records += 1
                 if sequence_number:
                     failed_sequence_numbers.append(sequence_number)
-                logger.warning(f"Failed to deserialize record: {sequence_number}")
+                    failed_sequence_set.add(sequence_number)
+                if logger.isEnabledFor(logging.WARNING):
+                    logger.warning("Failed to deserialize record: %s", sequence_number)
         
-        logger.info(f"Successfully deserialized {len(posts)} posts, {failed_records} failures")
+        logger.info("Successfully deserialized %d posts, %d failures", len(posts), failed_records)
         
         if not posts:
             logger.warning("No posts to process after deserialization")
@@ -142,31 +209,43 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         sampled_posts = random.sample(posts, sample_size)
         
         logger.info(
-            f"Randomly sampled {sample_size} posts from {len(posts)} total posts for sentiment analysis"
+            "Randomly sampled %d posts from %d total posts for sentiment analysis",
+            sample_size, len(posts)
         )
         
-        # Step 3: Analyze sentiment with single Bedrock API call
-        logger.info(f"Analyzing sentiment for {sample_size} posts with single Bedrock API call")
+        # Step 3: Analyze sentiment (one Bedrock API call unless sub-batching is
+        # enabled; posts already in the sentiment cache are not sent)
+        logger.info("Analyzing sentiment for %d posts", sample_size)
         
         try:
             bedrock_start = time.time()
-            sentiment_results = sentiment_analyzer.analyze_batch(sampled_posts)
+            if use_async:
+                # Sub-batches are awaited together on one event loop instead
+                # of occupying a thread each
+                sentiment_results = asyncio.run(
+                    sentiment_analyzer.analyze_batch_async(sampled_posts)
+                )
+            else:
+                sentiment_results = sentiment_analyzer.analyze_batch(sampled_posts)
             bedrock_total_latency_ms = (time.time() - bedrock_start) * 1000
+            bedrock_api_calls = sentiment_analyzer.last_api_calls
             
             successful_records += len(sentiment_results)
             
             logger.info(
-                f"Bedrock analysis completed in {bedrock_total_latency_ms:.2f}ms. "
-                f"Got {len(sentiment_results)} sentiment results from {sample_size} sampled posts."
+                "Bedrock analysis completed in %.2fms. "
+                "Got %d sentiment results from %d sampled posts.",
+                bedrock_total_latency_ms, len(sentiment_results), sample_size
             )
             
         except Exception as e:
-            logger.error(f"Failed to analyze sentiment: {e}", exc_info=True)
+            logger.error("Failed to analyze sentiment: %s", e)
             # Mark all posts as failed
             for post in posts:
                 seq_num = post_to_sequence.get(post.id)
-                if seq_num and seq_num not in failed_sequence_numbers:
+                if seq_num and seq_num not in failed_sequence_set:
                     failed_sequence_numbers.append(seq_num)
+                    failed_sequence_set.add(seq_num)
                     failed_records += 1
             
             # Return early with failures
@@ -178,7 +257,8 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 failed_records=failed_records,
                 bedrock_api_calls=0,
                 bedrock_total_latency_ms=0.0,
-                total_processing_time_ms=total_processing_time_ms
+                total_processing_time_ms=total_processing_time_ms,
+                timestamp=start_time
             )
             return _create_response(failed_sequence_numbers)
         
@@ -191,21 +271,35 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         logger.info("Extracting insights from sentiment results")
         
         try:
+            # The extractors are independent of each other, so run them concurrently
+            product_future = _INSIGHTS_EXECUTOR.submit(
+                product_extractor.extract_insights, sampled_posts, sentiment_results
+            )
+            topics_future = _INSIGHTS_EXECUTOR.submit(
+                topics_extractor.extract_insights, sampled_posts, sentiment_results
+            )
+            engagement_future = _INSIGHTS_EXECUTOR.submit(
+                engagement_correlator.extract_insights, sampled_posts, sentiment_results
+            )
+            geographic_future = _INSIGHTS_EXECUTOR.submit(
+                geographic_analyzer.extract_insights, sampled_posts, sentiment_results
+            )
+            
             # Product sentiment insights
-            product_insights = product_extractor.extract_insights(sampled_posts, sentiment_results)
-            logger.info(f"Extracted {len(product_insights)} product insights")
+            product_insights = product_future.result()
+            logger.info("Extracted %d product insights", len(product_insights))
             
             # Trending topics insights
-            topic_insights = topics_extractor.extract_insights(sampled_posts, sentiment_results)
-            logger.info(f"Extracted {len(topic_insights)} topic insights")
+            topic_insights = topics_future.result()
+            logger.info("Extracted %d topic insights", len(topic_insights))
             
             # Engagement-sentiment correlation
-            engagement_insight = engagement_correlator.extract_insights(sampled_posts, sentiment_results)
+            engagement_insight = engagement_future.result()
             logger.info("Extracted engagement-sentiment correlation insight")
             
             # Geographic sentiment insights
-            geographic_insights = geographic_analyzer.extract_insights(sampled_posts, sentiment_results)
-            logger.info(f"Extracted {len(geographic_insights)} geographic insights")
+            geographic_insights = geographic_future.result()
+            logger.info("Extracted %d geographic insights", len(geographic_insights))
             
             # Publish aggregated metrics to CloudWatch Metrics for dashboards
             insights_dict = {
@@ -218,7 +312,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             logger.info("Published insight metrics to CloudWatch")
             
         except Exception as e:
-            logger.error(f"Failed to extract insights: {e}", exc_info=True)
+            logger.error("Failed to extract insights: %s", e)
         
         # Step 5: Emit processing metrics
         total_processing_time_ms = (time.time() - start_time) * 1000
@@ -229,25 +323,27 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 total_records=total_records,
                 successful_records=successful_records,
                 failed_records=failed_records,
-                bedrock_api_calls=1,  # Single API call per Lambda invocation
+                bedrock_api_calls=bedrock_api_calls,
                 bedrock_total_latency_ms=bedrock_total_latency_ms,
-                total_processing_time_ms=total_processing_time_ms
+                total_processing_time_ms=total_processing_time_ms,
+                timestamp=start_time
             )
             logger.info("Successfully emitted processing metrics")
         except Exception as e:
-            logger.error(f"Failed to emit metrics: {e}", exc_info=True)
+            logger.error("Failed to emit metrics: %s", e)
         
         # Log final summary
         logger.info(
-            f"Batch processing complete. Batch ID: {batch_id}, "
-            f"Total: {total_records}, Success: {successful_records}, "
-            f"Failed: {failed_records}, Duration: {total_processing_time_ms:.2f}ms"
+            "Batch processing complete. Batch ID: %s, "
+            "Total: %d, Success: %d, Failed: %d, Duration: %.2fms",
+            batch_id, total_records, successful_records,
+            failed_records, total_processing_time_ms
         )
         
         return _create_response(failed_sequence_numbers)
         
     except Exception as e:
-        logger.error(f"Unexpected error in Lambda handler: {e}", exc_info=True)
+        logger.error("Unexpected error in Lambda handler: %s", e, exc_info=True)
         
         # Try to emit error metrics
         try:
@@ -259,18 +355,26 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 failed_records=total_records,  # Mark all as failed
                 bedrock_api_calls=0,
                 bedrock_total_latency_ms=bedrock_total_latency_ms,
-                total_processing_time_ms=total_processing_time_ms
+                total_processing_time_ms=total_processing_time_ms,
+                timestamp=start_time
             )
         except:
             pass
         
-        # Return all records as failed for retry
-        all_sequence_numbers = [
-            record.get('kinesis', {}).get('sequenceNumber')
-            for record in event.get('Records', [])
-            if record.get('kinesis', {}).get('sequenceNumber')
-        ]
+        # Return all records as failed for retry. The sequence numbers were
+        # collected during deserialization; only re-walk the records if the
+        # failure interrupted that loop.
+        if len(all_sequence_numbers) < total_records:
+            all_sequence_numbers = [
+                sequence_number
+                for record in records
+                for sequence_number in (record.get('kinesis', {}).get('sequenceNumber'),)
+                if sequence_number
+            ]
         return _create_response(all_sequence_numbers)
+    
+    finally:
+        clear_batch_timestamp()
 
 
 def _create_response(failed_sequence_numbers: List[str]) -> Dict[str, Any]:
@@ -301,7 +405,8 @@ def emit_processing_metrics(
     failed_records: int,
     bedrock_api_calls: int,
     bedrock_total_latency_ms: float,
-    total_processing_time_ms: float
+    total_processing_time_ms: float,
+    timestamp: Optional[float] = None
 ) -> None:
     """
     Emit CloudWatch metrics for batch processing.
@@ -320,9 +425,13 @@ def emit_processing_metrics(
         bedrock_api_calls: Number of Bedrock API calls made
         bedrock_total_latency_ms: Total time spent in Bedrock API calls
         total_processing_time_ms: Total processing time for the batch
+        timestamp: Metric timestamp in epoch seconds (defaults to now)
         
     Requirements: 10.4, 12.5
     """
+    if total_records == 0 and bedrock_api_calls == 0:
+        return
+    
     try:
         metrics_client = get_cloudwatch_metrics_client()
         
@@ -335,68 +444,21 @@ def emit_processing_metrics(
             if bedrock_api_calls > 0 else 0.0
         )
         
-        # Prepare metric data
+        # Fill the fixed metric schema; only Value and Timestamp vary per call
+        if timestamp is None:
+            timestamp = time.time()
+        dimensions = _dims_for(environment)
+        values = (
+            error_rate,
+            total_processing_time_ms,
+            bedrock_api_calls,
+            avg_bedrock_latency_ms,
+            successful_records,
+            failed_records,
+        )
         metric_data = [
-            {
-                'MetricName': 'ErrorRate',
-                'Value': error_rate,
-                'Unit': 'Percent',
-                'Timestamp': datetime.utcnow(),
-                'Dimensions': [
-                    {'Name': 'Environment', 'Value': environment},
-                    {'Name': 'Component', 'Value': 'SentimentAnalysis'}
-                ]
-            },
-            {
-                'MetricName': 'ProcessingLatency',
-                'Value': total_processing_time_ms,
-                'Unit': 'Milliseconds',
-                'Timestamp': datetime.utcnow(),
-                'Dimensions': [
-                    {'Name': 'Environment', 'Value': environment},
-                    {'Name': 'Component', 'Value': 'SentimentAnalysis'}
-                ]
-            },
-            {
-                'MetricName': 'BedrockAPICallCount',
-                'Value': bedrock_api_calls,
-                'Unit': 'Count',
-                'Timestamp': datetime.utcnow(),
-                'Dimensions': [
-                    {'Name': 'Environment', 'Value': environment},
-                    {'Name': 'Component', 'Value': 'SentimentAnalysis'}
-                ]
-            },
-            {
-                'MetricName': 'BedrockAPILatency',
-                'Value': avg_bedrock_latency_ms,
-                'Unit': 'Milliseconds',
-                'Timestamp': datetime.utcnow(),
-                'Dimensions': [
-                    {'Name': 'Environment', 'Value': environment},
-                    {'Name': 'Component', 'Value': 'SentimentAnalysis'}
-                ]
-            },
-            {
-                'MetricName': 'SuccessfulRecords',
-                'Value': successful_records,
-                'Unit': 'Count',
-                'Timestamp': datetime.utcnow(),
-                'Dimensions': [
-                    {'Name': 'Environment', 'Value': environment},
-                    {'Name': 'Component', 'Value': 'SentimentAnalysis'}
-                ]
-            },
-            {
-                'MetricName': 'FailedRecords',
-                'Value': failed_records,
-                'Unit': 'Count',
-                'Timestamp': datetime.utcnow(),
-                'Dimensions': [
-                    {'Name': 'Environment', 'Value': environment},
-                    {'Name': 'Component', 'Value': 'SentimentAnalysis'}
-                ]
-            }
+            dict(template, Value=value, Timestamp=timestamp, Dimensions=dimensions)
+            for template, value in zip(_PROCESSING_METRIC_TEMPLATES, values)
         ]
         
         # Put metrics to CloudWatch
@@ -406,12 +468,12 @@ def emit_processing_metrics(
         )
         
         logger.info(
-            f"Emitted metrics: ErrorRate={error_rate:.2f}%, "
-            f"ProcessingLatency={total_processing_time_ms:.2f}ms, "
-            f"BedrockAPICalls={bedrock_api_calls}, "
-            f"BedrockLatency={avg_bedrock_latency_ms:.2f}ms"
+            "Emitted metrics: ErrorRate=%.2f%%, ProcessingLatency=%.2fms, "
+            "BedrockAPICalls=%d, BedrockLatency=%.2fms",
+            error_rate, total_processing_time_ms,
+            bedrock_api_calls, avg_bedrock_latency_ms
         )
         
     except Exception as e:
-        logger.error(f"Failed to emit CloudWatch metrics: {e}", exc_info=True)
+        logger.error("Failed to emit CloudWatch metrics: %s", e, exc_info=True)
         # Don't raise - metrics emission failure shouldn't fail the Lambda
@@ -6,10 +6,47 @@ pipeline, including sentiment results, various insight types, and processing met
 """
 
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import List, Optional
 
 
+# Valid sentiment classifications
+VALID_SENTIMENTS = frozenset({"positive", "negative", "neutral"})
+
+# Batch-level timestamp shared by every model created during one Lambda
+# invocation. Set by the handler at the start of a batch and cleared at the end.
+_BATCH_TS: List[Optional[datetime]] = [None]
+
+
+def _utc_now() -> datetime:
+    """Return the current UTC time as a naive datetime, like the rest of the pipeline."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def set_batch_timestamp(timestamp: Optional[datetime] = None) -> datetime:
+    """
+    Pin the timestamp used as the default for all models in the current batch.
+    
+    Args:
+        timestamp: Timestamp to share (defaults to the current UTC time)
+        
+    Returns:
+        The pinned timestamp
+    """
+    _BATCH_TS[0] = timestamp or _utc_now()
+    return _BATCH_TS[0]
+
+
+def clear_batch_timestamp() -> None:
+    """Clear the batch timestamp so later models fall back to the current time."""
+    _BATCH_TS[0] = None
+
+
+def batch_timestamp() -> datetime:
+    """Return the pinned batch timestamp, or the current UTC time if none is set."""
+    return _BATCH_TS[0] or _utc_now()
+
+
 @dataclass
 class SentimentResult:
     """
@@ -21,21 +58,21 @@ class SentimentResult:
         sentiment_score: Intensity score from -1.0 (very negative) to 1.0 (very positive)
         confidence: Confidence level from 0.0 to 1.0
         timestamp: When the analysis was performed
-        analysis_duration_ms: Time taken for Bedrock API call in milliseconds
+        analysis_duration_ms: Per-post analysis time in milliseconds, if recorded.
+            SentimentAnalyzer reports batch time in last_duration_ms instead.
     """
     post_id: str
     sentiment: str  # "positive", "negative", "neutral"
     sentiment_score: float  # -1.0 to 1.0
     confidence: float  # 0.0 to 1.0
-    timestamp: datetime = field(default_factory=datetime.utcnow)
+    timestamp: datetime = field(default_factory=batch_timestamp)
     analysis_duration_ms: float = 0.0
 
     def __post_init__(self):
         """Validate sentiment result data."""
-        valid_sentiments = {"positive", "negative", "neutral"}
-        if self.sentiment not in valid_sentiments:
+        if self.sentiment not in VALID_SENTIMENTS:
             raise ValueError(
-                f"Invalid sentiment '{self.sentiment}'. Must be one of: {valid_sentiments}"
+                f"Invalid sentiment '{self.sentiment}'. Must be one of: {set(VALID_SENTIMENTS)}"
             )
         if not -1.0 <= self.sentiment_score <= 1.0:
             raise ValueError(
@@ -48,6 +85,34 @@ class SentimentResult:
         if self.analysis_duration_ms < 0:
             raise ValueError("Analysis duration cannot be negative")
 
+    @classmethod
+    def from_trusted(
+        cls,
+        post_id: str,
+        sentiment: str,
+        sentiment_score: float,
+        confidence: float,
+        timestamp: Optional[datetime] = None,
+        analysis_duration_ms: float = 0.0
+    ) -> "SentimentResult":
+        """
+        Create a SentimentResult without running __post_init__ validation.
+        
+        Only use this for values the caller has already normalized (for example
+        scores clamped and classified by SentimentAnalyzer). All other callers
+        should use the regular constructor.
+        """
+        result = object.__new__(cls)
+        result.__dict__.update(
+            post_id=post_id,
+            sentiment=sentiment,
+            sentiment_score=sentiment_score,
+            confidence=confidence,
+            timestamp=timestamp or batch_timestamp(),
+            analysis_duration_ms=analysis_duration_ms,
+        )
+        return result
+
 
 @dataclass
 class ProductInsight:
@@ -74,7 +139,7 @@ class ProductInsight:
     negative_count: int
     neutral_count: int
     average_engagement: float
-    timestamp: datetime = field(default_factory=datetime.utcnow)
+    timestamp: datetime = field(default_factory=batch_timestamp)
 
     def __post_init__(self):
         """Validate product insight data."""
@@ -121,7 +186,7 @@ class TopicInsight:
     average_sentiment: float
     is_trending: bool
     co_occurring_hashtags: List[str] = field(default_factory=list)
-    timestamp: datetime = field(default_factory=datetime.utcnow)
+    timestamp: datetime = field(default_factory=batch_timestamp)
 
     def __post_init__(self):
         """Validate topic insight data."""
@@ -158,7 +223,7 @@ class EngagementInsight:
     high_engagement_negative_posts: List[str] = field(default_factory=list)
     low_engagement_positive_posts: List[str] = field(default_factory=list)
     correlation_coefficient: float = 0.0
-    timestamp: datetime = field(default_factory=datetime.utcnow)
+    timestamp: datetime = field(default_factory=batch_timestamp)
 
     def __post_init__(self):
         """Validate engagement insight data."""
@@ -195,7 +260,7 @@ class GeographicInsight:
     average_sentiment: float
     post_count: int
     dominant_sentiment: str  # "positive", "negative", "neutral"
-    timestamp: datetime = field(default_factory=datetime.utcnow)
+    timestamp: datetime = field(default_factory=batch_timestamp)
 
     def __post_init__(self):
         """Validate geographic insight data."""
@@ -209,11 +274,10 @@ class GeographicInsight:
             )
         if self.post_count < 0:
             raise ValueError("Post count cannot be negative")
-        valid_sentiments = {"positive", "negative", "neutral"}
-        if self.dominant_sentiment not in valid_sentiments:
+        if self.dominant_sentiment not in VALID_SENTIMENTS:
             raise ValueError(
                 f"Invalid dominant_sentiment '{self.dominant_sentiment}'. "
-                f"Must be one of: {valid_sentiments}"
+                f"Must be one of: {set(VALID_SENTIMENTS)}"
             )
 
 
@@ -244,7 +308,7 @@ class ViralEventInsight:
     dominant_sentiment: str  # "positive", "negative", "neutral"
     top_products: List[str] = field(default_factory=list)
     top_hashtags: List[str] = field(default_factory=list)
-    timestamp: datetime = field(default_factory=datetime.utcnow)
+    timestamp: datetime = field(default_factory=batch_timestamp)
 
     def __post_init__(self):
         """Validate viral event insight data."""
@@ -264,11 +328,10 @@ class ViralEventInsight:
             raise ValueError(
                 f"Invalid sentiment_shift {self.sentiment_shift}. Must be between -2.0 and 2.0"
             )
-        valid_sentiments = {"positive", "negative", "neutral"}
-        if self.dominant_sentiment not in valid_sentiments:
+        if self.dominant_sentiment not in VALID_SENTIMENTS:
             raise ValueError(
                 f"Invalid dominant_sentiment '{self.dominant_sentiment}'. "
-                f"Must be one of: {valid_sentiments}"
+                f"Must be one of: {set(VALID_SENTIMENTS)}"
             )
 
 
@@ -296,7 +359,7 @@ class BatchProcessingMetrics:
     bedrock_api_calls: int
     bedrock_total_latency_ms: float
     total_processing_time_ms: float
-    timestamp: datetime = field(default_factory=datetime.utcnow)
+    timestamp: datetime = field(default_factory=batch_timestamp)
 
     def __post_init__(self):
         """Validate batch processing metrics."""
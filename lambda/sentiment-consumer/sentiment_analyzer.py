@@ -5,61 +5,389 @@ This module provides sentiment analysis capabilities by invoking Amazon Bedrock'
 Nova Micro model to classify social media posts and extract sentiment scores.
 """
 
+import asyncio
+import io
 import json
 import logging
 import time
 import random
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+import re
+import threading
+import unicodedata
+import uuid
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache, partial
+from typing import List, Dict, Any, Optional, Tuple
 
-from models import SentimentResult
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError, ParamValidationError
+
+from models import SentimentResult, batch_timestamp
+
+# orjson ships in the Lambda layer; fall back to the standard library for local runs
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# aiobotocore is optional; it is only needed for analyze_batch_async
+try:
+    from aiobotocore.session import get_session as get_aio_session
+except ImportError:
+    get_aio_session = None
 
 # Configure logging
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+# Bedrock error codes that indicate a transient failure worth retrying
+_RETRYABLE_ERROR_CODES = frozenset({
+    'ThrottlingException',
+    'InternalServerException',
+    'ServiceUnavailableException',
+    'TooManyRequestsException'
+})
 
-class ExponentialBackoff:
+# Bound once; used for backoff jitter on every retry
+_random = random.random
+
+# Scores within +/- this band of zero are classified as neutral
+_NEUTRAL_BAND = 0.1
+
+# Posts that are nothing but links carry no text to score; they are classified
+# as neutral locally instead of being sent to Bedrock
+_URL_ONLY_RE = re.compile(r"\s*(?:https?://\S+\s*)+")
+
+# Model IDs that rejected latency-optimized inference in this process. Checked
+# before every call so unsupported models only fail once per Lambda container.
+_LATENCY_UNSUPPORTED_MODELS = set()
+
+# Converse parameters shared by every request; botocore does not mutate them
+_INFERENCE_CONFIG = {
+    'temperature': 0.0,  # Deterministic results
+    'maxTokens': 2000,   # Sufficient for batch responses
+    'topP': 1.0
+}
+_LATENCY_OPTIMIZED = {'latency': 'optimized'}
+
+# Tool the model is forced to call with its scores when structured output is
+# enabled. Bedrock validates the call against the schema and returns the tool
+# input already parsed, so no text has to be scraped for the score list.
+_SENTIMENT_TOOL_NAME = 'emit_sentiments'
+_SENTIMENT_TOOL_CONFIG = {
+    'tools': [
+        {
+            'toolSpec': {
+                'name': _SENTIMENT_TOOL_NAME,
+                'description': 'Record the sentiment score of every text.',
+                'inputSchema': {
+                    'json': {
+                        'type': 'object',
+                        'properties': {
+                            'scores': {
+                                'type': 'array',
+                                'description': 'One score per text, in the same order',
+                                'items': {
+                                    'type': 'number',
+                                    'minimum': -1.0,
+                                    'maximum': 1.0
+                                }
+                            }
+                        },
+                        'required': ['scores']
+                    }
+                }
+            }
+        }
+    ],
+    'toolChoice': {'tool': {'name': _SENTIMENT_TOOL_NAME}}
+}
+
+# Output budget per requested score ("-0.75" plus a newline is a few tokens),
+# with headroom so a slightly chatty answer is not cut off
+_TOKENS_PER_SCORE = 8
+_TOKENS_OVERHEAD = 16
+
+# A forced sentiment tool call costs more per answer: the {"scores": [...]}
+# JSON with its separators, the tool-use framing and any text block the model
+# writes before the call
+_TOOL_TOKENS_PER_SCORE = 12
+_TOOL_TOKENS_OVERHEAD = 200
+
+# Batch inference records use the model's native request body, which for Nova
+# names the inference parameters differently from the converse API
+_BATCH_INFERENCE_CONFIG = {
+    'temperature': 0.0,
+    'max_new_tokens': 2000,
+    'top_p': 1.0
+}
+
+# Stand-in for a post when parsing batch inference output, where only the
+# record ID (the post ID) comes back
+_BatchRecord = namedtuple('_BatchRecord', ['id'])
+
+# Thread pool for concurrent Bedrock sub-batch invocations (reused across
+# warm Lambda invocations)
+_BEDROCK_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix='bedrock')
+
+# Settings for bedrock-runtime clients. Connections are kept alive and pooled
+# for every executor worker, and botocore's own retries are disabled because
+# ExponentialBackoff already retries throttling and transient errors.
+BEDROCK_CLIENT_CONFIG = Config(
+    retries={'max_attempts': 0},
+    tcp_keepalive=True,
+    max_pool_connections=16,
+    connect_timeout=2,
+    read_timeout=30
+)
+
+
+class SentimentCache:
     """
-    Helper class for implementing exponential backoff retry logic.
+    Thread-safe LRU cache of sentiment scores keyed by normalized post text.
     
-    Provides exponentially increasing delays between retry attempts with
-    optional jitter to prevent thundering herd problems.
+    Reposts, replies and duplicate posts normalize to the same key (see
+    _cache_key), so their sentiment can be reused instead of paying for
+    another model call.
     
     Attributes:
-        max_retries: Maximum number of retry attempts
-        base_delay_ms: Initial delay in milliseconds
-        max_delay_ms: Maximum delay cap in milliseconds
-        jitter: Whether to add random jitter to delays
+        maxsize: Maximum number of cached entries
     """
     
-    def __init__(
-        self,
-        max_retries: int = 3,
-        base_delay_ms: float = 100.0,
-        max_delay_ms: float = 5000.0,
-        jitter: bool = True
-    ):
+    def __init__(self, maxsize: int = 10_000):
         """
-        Initialize exponential backoff configuration.
+        Initialize the cache.
         
         Args:
-            max_retries: Maximum number of retry attempts (default: 3)
-            base_delay_ms: Initial delay in milliseconds (default: 100ms)
-            max_delay_ms: Maximum delay cap in milliseconds (default: 5000ms)
-            jitter: Whether to add random jitter (default: True)
+            maxsize: Maximum number of cached entries (default: 10,000)
         """
-        self.max_retries = max_retries
-        self.base_delay_ms = base_delay_ms
-        self.max_delay_ms = max_delay_ms
-        self.jitter = jitter
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        """Get the cached (sentiment, score) for a cache key, if any."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+    
+    def put(self, key: str, sentiment: str, score: float) -> None:
+        """Cache the sentiment and score for a cache key."""
+        with self._lock:
+            self._entries[key] = (sentiment, score)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        """Remove all cached entries."""
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Sentiment cache shared by all analyzers in the process (survives warm invocations)
+_SENTIMENT_CACHE = SentimentCache(maxsize=10_000)
+
+
+def _truncate_content(content: str) -> str:
+    """
+    Get the text sent to Bedrock for a post: its first 10 words.
+    
+    maxsplit stops scanning after the 10th word, so long posts cost the same
+    as short ones.
+    """
+    return ' '.join(content.split(None, 10)[:10])
+
+
+def _is_punctuation(token: str) -> bool:
+    """Check whether every character of a token is Unicode punctuation."""
+    return all(unicodedata.category(char)[0] == 'P' for char in token)
+
+
+def _cache_key(content: str) -> str:
+    """
+    Get the sentiment cache key for a post: its first 10 meaningful words.
+    
+    Reposts and replies differ from the original only by an "RT:" prefix, a
+    leading @mention, a numeric tag such as "#123", punctuation or letter
+    case, none of which change the sentiment. Those tokens are skipped so
+    near-duplicates share one cache entry and one Bedrock score. Emoji are
+    kept, since "great service 🙄" and "great service 😀" read differently.
+    Posts with no words left fall back to their exact text.
+    """
+    words = []
+    for token in content.split():
+        if (token[0] == '@' or token == 'RT:'
+                or (token[0] == '#' and token[1:].isdigit())
+                or (not any(map(str.isalnum, token)) and _is_punctuation(token))):
+            continue
+        words.append(token.casefold())
+        if len(words) == 10:
+            break
+    return ' '.join(words) if words else _truncate_content(content)
+
+
+@lru_cache(maxsize=64)
+def _inference_config(num_posts: int, structured: bool = False) -> Dict[str, Any]:
+    """
+    Get the converse inferenceConfig for a batch of num_posts.
+    
+    maxTokens is sized to the expected answer instead of the 2000-token
+    ceiling, so a model that keeps generating past the scores is stopped
+    early. The returned dict is shared and must not be mutated.
+    
+    Args:
+        num_posts: Number of posts in the batch
+        structured: Whether the scores are returned through the sentiment
+                  tool, which needs the larger tool-call budget
+        
+    Returns:
+        inferenceConfig dictionary
+    """
+    if structured:
+        budget = _TOOL_TOKENS_PER_SCORE * num_posts + _TOOL_TOKENS_OVERHEAD
+    else:
+        budget = _TOKENS_PER_SCORE * num_posts + _TOKENS_OVERHEAD
+    max_tokens = min(budget, _INFERENCE_CONFIG['maxTokens'])
+    return dict(_INFERENCE_CONFIG, maxTokens=max_tokens)
+
+
+@lru_cache(maxsize=64)
+def _prompt_template(num_posts: int, structured: bool = False) -> Tuple[str, str]:
+    """
+    Build the static text that surrounds the post texts in the prompt.
+    
+    The instructions only depend on the number of posts, so they are built
+    once per batch size and reused across invocations.
+    
+    Args:
+        num_posts: Number of posts in the batch
+        structured: Whether the scores are returned through the sentiment
+                  tool, whose schema already describes the output format
+        
+    Returns:
+        Tuple of (text before the posts JSON, text after the posts JSON)
+    """
+    if structured:
+        prefix = f"""Score the sentiment of each of these {num_posts} texts from -1.0 (very negative) to 1.0 (very positive).
+
+Texts: """
+        return prefix, ""
+    
+    # Construct minimal prompt commanding bare scores, one per line; this
+    # needs fewer output tokens than a JSON array and parses with split()
+    prefix = f"""Score the sentiment of each of these {num_posts} texts.
+
+Texts: """
+    example = "\n".join(["0.0"] * min(num_posts, 3))
+    suffix = f"""
+
+Return EXACTLY {num_posts} numbers, one per line, in the same order as the texts:
+-1.0 = very negative, 0.0 = neutral, 1.0 = very positive.
+Return ONLY the numbers.
+
+Example:
+{example}"""
+    return prefix, suffix
+
+
+def _client_error_code(exception: ClientError) -> str:
+    """
+    Get the service error code from a botocore ClientError.
+    
+    Errors raised mid-stream by converse_stream use lower camel case event
+    names (e.g. throttlingException), so the first letter is capitalized to
+    match the regular API error codes.
+    """
+    code = exception.response.get('Error', {}).get('Code', '')
+    return code[:1].upper() + code[1:]
+
+
+def _count_scores(text: str) -> int:
+    """Count the complete lines of text that parse as a number."""
+    count = 0
+    for line in text.split('\n')[:-1]:
+        try:
+            float(line)
+        except ValueError:
+            continue
+        count += 1
+    return count
+
+
+def _retry_after_seconds(exception: Exception) -> Optional[float]:
+    """
+    Get the server's retry hint from a throttled Bedrock call, if any.
+    
+    Checks the Error.RetryAfterSeconds field and the HTTP Retry-After header.
+    Only delta-seconds values are understood; HTTP-date values are ignored.
+    
+    Args:
+        exception: The exception that was raised
+        
+    Returns:
+        Seconds the server asked us to wait, or None if no usable hint
+    """
+    if not isinstance(exception, ClientError):
+        return None
+    
+    response = exception.response
+    hint = response.get('Error', {}).get('RetryAfterSeconds')
+    if hint is None:
+        hint = response.get('ResponseMetadata', {}).get('HTTPHeaders', {}).get('retry-after')
+    if hint is None:
+        return None
+    
+    try:
+        seconds = float(hint)
+    except (TypeError, ValueError):
+        return None
+    return seconds if seconds >= 0 else None
+
+
+@dataclass(frozen=True, slots=True)
+class ExponentialBackoff:
+    """
+    Helper class for implementing exponential backoff retry logic.
+    
+    Provides exponentially increasing delays between retry attempts with
+    optional jitter to prevent thundering herd problems. Instances hold no
+    retry state, so they are immutable and shared through _get_backoff.
+    
+    Attributes:
+        max_retries: Maximum number of retry attempts (default: 3)
+        base_delay_ms: Initial delay in milliseconds (default: 100ms)
+        max_delay_ms: Maximum delay cap in milliseconds (default: 5000ms)
+        jitter: Whether to apply full jitter (default: True)
+    """
+    max_retries: int = 3
+    base_delay_ms: float = 100.0
+    max_delay_ms: float = 5000.0
+    jitter: bool = True
+    _delays_s: Tuple[float, ...] = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        """Precompute the capped delay in seconds for every retry attempt."""
+        object.__setattr__(self, '_delays_s', tuple(
+            min(self.base_delay_ms * (1 << attempt), self.max_delay_ms) / 1000.0
+            for attempt in range(self.max_retries + 1)
+        ))
     
     def get_delay(self, attempt: int) -> float:
         """
         Calculate delay for a given retry attempt.
         
-        Uses exponential backoff: delay = base_delay * (2 ^ attempt)
-        Optionally adds jitter: delay *= random(0.5, 1.5)
+        Uses exponential backoff: delay = min(base_delay * (2 ^ attempt), max_delay)
+        Optionally applies "full jitter": delay = random(0, delay)
         
         Args:
             attempt: Current retry attempt number (0-indexed)
@@ -67,16 +395,39 @@ class ExponentialBackoff:
         Returns:
             Delay in seconds (converted from milliseconds)
         """
-        # Calculate exponential delay: 100ms, 200ms, 400ms, 800ms, ...
-        delay_ms = min(self.base_delay_ms * (2 ** attempt), self.max_delay_ms)
+        # Exponential delay in seconds: 0.1s, 0.2s, 0.4s, 0.8s, ...
+        if attempt < len(self._delays_s):
+            delay = self._delays_s[attempt]
+        else:
+            delay = min(self.base_delay_ms * (1 << attempt), self.max_delay_ms) / 1000.0
         
-        # Add jitter if enabled (±50% randomization)
+        # Full jitter spreads concurrent retries across the whole window
+        # instead of clustering them around the nominal delay
         if self.jitter:
-            jitter_factor = random.uniform(0.5, 1.5)
-            delay_ms *= jitter_factor
+            delay *= _random()
+        
+        return delay
+    
+    def get_retry_delay(self, attempt: int, exception: Exception) -> float:
+        """
+        Calculate delay for a retry, honoring the server's retry hint.
         
-        # Convert to seconds
-        return delay_ms / 1000.0
+        Uses max(server_hint, get_delay(attempt)) when the exception carries
+        a Retry-After hint. The hint is capped at max_delay_ms so a single
+        retry cannot consume the rest of the Lambda's time budget.
+        
+        Args:
+            attempt: Current retry attempt number (0-indexed)
+            exception: The exception that triggered the retry
+            
+        Returns:
+            Delay in seconds
+        """
+        delay = self.get_delay(attempt)
+        hint = _retry_after_seconds(exception)
+        if hint is None:
+            return delay
+        return max(min(hint, self.max_delay_ms / 1000.0), delay)
     
     def should_retry(self, attempt: int, exception: Exception) -> bool:
         """
@@ -102,43 +453,39 @@ class ExponentialBackoff:
         if attempt >= self.max_retries:
             return False
         
-        # Get exception name
-        exception_name = exception.__class__.__name__
+        # Service errors are identified by their error code; anything else
+        # (e.g. modeled exceptions raised by other clients) by class name
+        if isinstance(exception, ClientError):
+            error_name = _client_error_code(exception)
+        else:
+            error_name = exception.__class__.__name__
         
-        # Check for retryable Bedrock exceptions
-        retryable_exceptions = {
-            'ThrottlingException',
-            'InternalServerException',
-            'ServiceUnavailableException',
-            'TooManyRequestsException'
-        }
-        
-        # Check if this is a boto3 client error
-        if hasattr(exception, 'response'):
-            error_code = exception.response.get('Error', {}).get('Code', '')
-            if error_code in retryable_exceptions:
-                logger.info(
-                    f"Retryable error detected: {error_code}. "
-                    f"Attempt {attempt + 1}/{self.max_retries}"
-                )
-                return True
-        
-        # Check exception class name as fallback
-        if exception_name in retryable_exceptions:
+        if error_name in _RETRYABLE_ERROR_CODES:
             logger.info(
-                f"Retryable error detected: {exception_name}. "
-                f"Attempt {attempt + 1}/{self.max_retries}"
+                "Retryable error detected: %s. Attempt %d/%d",
+                error_name, attempt + 1, self.max_retries
             )
             return True
         
         # Non-retryable error
         logger.warning(
-            f"Non-retryable error detected: {exception_name}. "
-            "Will not retry."
+            "Non-retryable error detected: %s. Will not retry.",
+            error_name
         )
         return False
 
 
+@lru_cache(maxsize=16)
+def _get_backoff(
+    max_retries: int,
+    base_delay_ms: float,
+    max_delay_ms: float,
+    jitter: bool
+) -> ExponentialBackoff:
+    """Get the shared ExponentialBackoff for a retry configuration."""
+    return ExponentialBackoff(max_retries, base_delay_ms, max_delay_ms, jitter)
+
+
 class SentimentAnalyzer:
     """
     Analyzes sentiment of social media posts using Amazon Bedrock Nova Micro.
@@ -150,34 +497,85 @@ class SentimentAnalyzer:
     Attributes:
         bedrock_client: Boto3 Bedrock Runtime client
         model_id: Bedrock model identifier (default: amazon.nova-lite-v1:0)
+        sub_batch_size: Maximum posts per Bedrock call (None sends one call per batch)
+        latency_optimized: Whether to request latency-optimized inference
+        use_cache: Whether to reuse cached sentiment for duplicate post texts
+        stream_response: Whether to read scores from converse_stream
+        structured_output: Whether scores are returned through a forced tool call
         backoff: ExponentialBackoff instance for retry logic
+        last_api_calls: Number of Bedrock calls made by the last analyzed batch
+        last_duration_ms: Wall-clock time spent analyzing the last batch
     """
     
     def __init__(
         self, 
-        bedrock_client, 
+        bedrock_client=None, 
         model_id: str = "us.amazon.nova-lite-v1:0",
-        max_retries: int = 3
+        max_retries: int = 3,
+        sub_batch_size: Optional[int] = None,
+        latency_optimized: bool = False,
+        use_cache: bool = True,
+        stream_response: bool = False,
+        structured_output: bool = True
     ):
         """
         Initialize the sentiment analyzer.
         
         Args:
-            bedrock_client: Boto3 bedrock-runtime client instance
+            bedrock_client: Boto3 bedrock-runtime client instance. If omitted,
+                          one is created with BEDROCK_CLIENT_CONFIG.
             model_id: Bedrock model ID to use for analysis
             max_retries: Maximum number of retry attempts for failed API calls
+            sub_batch_size: Maximum posts per Bedrock call. Larger batches are
+                          split and the sub-batches are invoked concurrently.
+                          None (default) sends the whole batch in one call.
+            latency_optimized: Request Bedrock latency-optimized inference.
+                             Off by default: Nova Lite does not offer it and
+                             the layer's pinned botocore predates the
+                             parameter. Models that reject it fall back to
+                             standard inference for the rest of the process.
+            use_cache: Serve posts whose normalized text was already analyzed
+                     in this process from the shared sentiment cache instead
+                     of sending them to Bedrock.
+            stream_response: Read the model output from converse_stream and
+                           stop as soon as every score has arrived, instead of
+                           waiting for the complete converse response.
+            structured_output: Force the model to return its scores as the
+                             input of a schema-validated tool call instead of
+                             free-form text. Ignored when stream_response is
+                             set, which reads plain-text score lines.
+        
+        Raises:
+            ValueError: If sub_batch_size is less than 1
         """
+        if sub_batch_size is not None and sub_batch_size < 1:
+            raise ValueError("sub_batch_size must be at least 1")
+        
+        if bedrock_client is None:
+            bedrock_client = boto3.client('bedrock-runtime', config=BEDROCK_CLIENT_CONFIG)
+        
         self.bedrock_client = bedrock_client
         self.model_id = model_id
-        self.backoff = ExponentialBackoff(
-            max_retries=max_retries,
-            base_delay_ms=100.0,  # 100ms, 200ms, 400ms
-            max_delay_ms=5000.0,
-            jitter=True
+        self.sub_batch_size = sub_batch_size
+        self.latency_optimized = latency_optimized
+        self.use_cache = use_cache
+        self.stream_response = stream_response
+        self.structured_output = structured_output and not stream_response
+        self.last_api_calls = 0
+        self.last_duration_ms = 0.0
+        # Arguments that never change for this instance are bound once
+        self._invoke = partial(bedrock_client.converse, modelId=model_id)
+        if stream_response:
+            self._invoke_stream = partial(bedrock_client.converse_stream, modelId=model_id)
+        self.backoff = _get_backoff(
+            max_retries,
+            100.0,   # base_delay_ms: 100ms, 200ms, 400ms
+            5000.0,  # max_delay_ms
+            True     # jitter
         )
         logger.info(
-            f"Initialized SentimentAnalyzer with model: {model_id}, "
-            f"max_retries: {max_retries}"
+            "Initialized SentimentAnalyzer with model: %s, max_retries: %d",
+            model_id, max_retries
         )
     
     def analyze_batch(self, posts: List[Any]) -> List[SentimentResult]:
@@ -186,7 +584,10 @@ class SentimentAnalyzer:
         
         This method constructs a structured prompt containing all posts in the batch,
         invokes the Bedrock Nova Micro model, and parses the JSON response into
-        SentimentResult objects.
+        SentimentResult objects. When sub_batch_size is set, the batch is split
+        and the sub-batches are analyzed concurrently, with results merged back
+        in the original post order. Posts whose text is already in the
+        sentiment cache, and empty or link-only posts, are not sent to Bedrock.
         
         Args:
             posts: List of SocialMediaPost objects to analyze
@@ -198,41 +599,460 @@ class SentimentAnalyzer:
             ValueError: If the response cannot be parsed or is invalid
             Exception: If Bedrock API call fails after retries
         """
+        self.last_api_calls = 0
         if not posts:
             logger.warning("Empty batch provided to analyze_batch")
             return []
         
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         
         try:
-            # Construct the prompt
-            prompt = self._build_prompt(posts)
+            logger.info("Analyzing batch of %d posts with Bedrock", len(posts))
             
-            # Invoke Bedrock API
-            logger.info(f"Analyzing batch of {len(posts)} posts with Bedrock")
-            response = self._invoke_bedrock(prompt)
+            sentiment_results, pending, keys, duplicates = self._resolve_cached(posts)
+            if pending:
+                pending_posts = [posts[idx] for idx in pending]
+                sub_batches = self._split_batch(pending_posts)
+                self.last_api_calls = len(sub_batches)
+                
+                if len(sub_batches) == 1:
+                    fresh_results = self._analyze_subbatch(pending_posts)
+                else:
+                    # Overlap the I/O-bound Bedrock calls for each sub-batch
+                    futures = [
+                        _BEDROCK_EXECUTOR.submit(self._analyze_subbatch, sub_batch)
+                        for sub_batch in sub_batches
+                    ]
+                    fresh_results = []
+                    for future in futures:
+                        fresh_results.extend(future.result())
+                
+                self._merge_fresh(
+                    sentiment_results, pending, keys, fresh_results, posts, duplicates
+                )
             
-            # Parse response
-            sentiment_results = self._parse_response(response, posts)
+            return self._record_duration(sentiment_results, start_ns)
             
-            # Calculate duration
-            duration_ms = (time.time() - start_time) * 1000
+        except Exception as e:
+            # The caller logs the re-raised exception, so keep the traceback
+            # off the hot path unless debugging
+            logger.error("Failed to analyze batch: %s", e)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Batch analysis traceback", exc_info=True)
+            raise
+    
+    async def analyze_batch_async(self, posts: List[Any]) -> List[SentimentResult]:
+        """
+        Analyze sentiment for a batch of posts using non-blocking Bedrock calls.
+        
+        Async counterpart of analyze_batch built on aiobotocore. All sub-batches
+        are in flight at once on the event loop and share a single Bedrock
+        client (and its connection pool) for the duration of the batch.
+        
+        Args:
+            posts: List of SocialMediaPost objects to analyze
             
-            # Update duration for each result
-            for result in sentiment_results:
-                result.analysis_duration_ms = duration_ms / len(sentiment_results)
+        Returns:
+            List of SentimentResult objects with sentiment classifications and scores
             
-            logger.info(
-                f"Successfully analyzed {len(sentiment_results)} posts in {duration_ms:.2f}ms"
-            )
+        Raises:
+            RuntimeError: If aiobotocore is not installed
+            ValueError: If the response cannot be parsed or is invalid
+            Exception: If Bedrock API call fails after retries
+        """
+        if get_aio_session is None:
+            raise RuntimeError("aiobotocore is required for analyze_batch_async")
+        
+        self.last_api_calls = 0
+        if not posts:
+            logger.warning("Empty batch provided to analyze_batch_async")
+            return []
+        
+        start_ns = time.perf_counter_ns()
+        
+        try:
+            logger.info("Analyzing batch of %d posts with Bedrock (async)", len(posts))
+            
+            sentiment_results, pending, keys, duplicates = self._resolve_cached(posts)
+            if pending:
+                pending_posts = [posts[idx] for idx in pending]
+                sub_batches = self._split_batch(pending_posts)
+                self.last_api_calls = len(sub_batches)
+                
+                session = get_aio_session()
+                async with session.create_client(
+                    'bedrock-runtime',
+                    region_name=self.bedrock_client.meta.region_name
+                ) as client:
+                    sub_batch_results = await asyncio.gather(*(
+                        self._aanalyze_subbatch(client, sub_batch)
+                        for sub_batch in sub_batches
+                    ))
+                
+                fresh_results = [
+                    result for results in sub_batch_results for result in results
+                ]
+                self._merge_fresh(
+                    sentiment_results, pending, keys, fresh_results, posts, duplicates
+                )
             
-            return sentiment_results
+            return self._record_duration(sentiment_results, start_ns)
             
         except Exception as e:
-            logger.error(f"Failed to analyze batch: {e}", exc_info=True)
+            # The caller logs the re-raised exception, so keep the traceback
+            # off the hot path unless debugging
+            logger.error("Failed to analyze batch: %s", e)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Batch analysis traceback", exc_info=True)
             raise
     
-    def _build_prompt(self, posts: List[Any]) -> str:
+    def analyze_batch_offline(
+        self,
+        posts: List[Any],
+        s3_bucket: str,
+        s3_key_prefix: str,
+        role_arn: str,
+        s3_client=None,
+        bedrock_control_client=None
+    ) -> str:
+        """
+        Submit posts to Bedrock batch inference instead of on-demand calls.
+        
+        Batch inference costs less than on-demand invocation but completes
+        asynchronously, so it suits bulk re-scoring rather than the Kinesis
+        consumer path. Each post becomes one JSONL record keyed by post ID.
+        Bedrock requires a minimum number of records per job (100 for most
+        models).
+        
+        Args:
+            posts: List of SocialMediaPost objects
+            s3_bucket: Bucket for the job input and output
+            s3_key_prefix: Key prefix for the job input and output
+            role_arn: IAM role Bedrock assumes to read and write the bucket
+            s3_client: Boto3 S3 client (created in the runtime client's region if omitted)
+            bedrock_control_client: Boto3 bedrock client (created likewise if omitted)
+            
+        Returns:
+            ARN of the model invocation job, to pass to collect_results
+            
+        Raises:
+            ValueError: If posts is empty
+        """
+        if not posts:
+            raise ValueError("Cannot submit an empty batch for offline analysis")
+        
+        region_name = self.bedrock_client.meta.region_name
+        s3_client = s3_client or boto3.client('s3', region_name=region_name)
+        bedrock_control_client = bedrock_control_client or boto3.client(
+            'bedrock', region_name=region_name
+        )
+        
+        # Write one JSONL record per post
+        buffer = io.BytesIO()
+        for post in posts:
+            record = {
+                'recordId': post.id,
+                'modelInput': {
+                    'messages': [
+                        {
+                            'role': 'user',
+                            'content': [{'text': self._build_prompt([post])}]
+                        }
+                    ],
+                    'inferenceConfig': _BATCH_INFERENCE_CONFIG,
+                }
+            }
+            buffer.write(json.dumps(record, ensure_ascii=False).encode('utf-8'))
+            buffer.write(b'\n')
+        buffer.seek(0)
+        
+        job_name = f"sentiment-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        prefix = s3_key_prefix.rstrip('/')
+        input_key = f"{prefix}/input/{job_name}.jsonl"
+        s3_client.upload_fileobj(buffer, s3_bucket, input_key)
+        
+        response = bedrock_control_client.create_model_invocation_job(
+            jobName=job_name,
+            roleArn=role_arn,
+            modelId=self.model_id,
+            inputDataConfig={
+                's3InputDataConfig': {'s3Uri': f"s3://{s3_bucket}/{input_key}"}
+            },
+            outputDataConfig={
+                's3OutputDataConfig': {'s3Uri': f"s3://{s3_bucket}/{prefix}/output/"}
+            }
+        )
+        
+        job_arn = response['jobArn']
+        logger.info(
+            "Submitted %d posts for batch inference as job %s", len(posts), job_arn
+        )
+        return job_arn
+    
+    def collect_results(
+        self,
+        job_arn: str,
+        s3_client=None,
+        bedrock_control_client=None
+    ) -> Optional[List[SentimentResult]]:
+        """
+        Collect the results of a batch inference job submitted by analyze_batch_offline.
+        
+        Args:
+            job_arn: ARN returned by analyze_batch_offline
+            s3_client: Boto3 S3 client (created in the runtime client's region if omitted)
+            bedrock_control_client: Boto3 bedrock client (created likewise if omitted)
+            
+        Returns:
+            SentimentResult objects keyed to post IDs, or None if the job has
+            not finished yet. Records that failed inference are skipped.
+            
+        Raises:
+            RuntimeError: If the job ended without completing
+        """
+        region_name = self.bedrock_client.meta.region_name
+        s3_client = s3_client or boto3.client('s3', region_name=region_name)
+        bedrock_control_client = bedrock_control_client or boto3.client(
+            'bedrock', region_name=region_name
+        )
+        
+        job = bedrock_control_client.get_model_invocation_job(jobIdentifier=job_arn)
+        status = job['status']
+        if status in ('Submitted', 'Validating', 'Scheduled', 'InProgress', 'Stopping'):
+            return None
+        if status not in ('Completed', 'PartiallyCompleted'):
+            raise RuntimeError(
+                f"Batch inference job {job_arn} ended with status {status}: "
+                f"{job.get('message', '')}"
+            )
+        
+        # Bedrock writes <output prefix>/<job id>/<input file name>.out
+        input_uri = job['inputDataConfig']['s3InputDataConfig']['s3Uri']
+        output_uri = job['outputDataConfig']['s3OutputDataConfig']['s3Uri']
+        bucket, _, output_prefix = output_uri[len('s3://'):].partition('/')
+        job_id = job_arn.rsplit('/', 1)[-1]
+        input_name = input_uri.rsplit('/', 1)[-1]
+        output_key = f"{output_prefix.rstrip('/')}/{job_id}/{input_name}.out"
+        
+        body = s3_client.get_object(Bucket=bucket, Key=output_key)['Body']
+        
+        results = []
+        for line in body.iter_lines():
+            if not line:
+                continue
+            record = _json_loads(line)
+            model_output = record.get('modelOutput')
+            if model_output is None:
+                logger.warning(
+                    "Batch record %s failed: %s",
+                    record.get('recordId'), record.get('error')
+                )
+                continue
+            results.extend(
+                self._parse_response(model_output, [_BatchRecord(record['recordId'])])
+            )
+        
+        logger.info("Collected %d results from batch job %s", len(results), job_arn)
+        return results
+    
+    def _resolve_cached(
+        self,
+        posts: List[Any]
+    ) -> Tuple[List[Optional[SentimentResult]], List[int], List[str], List[Tuple[int, int]]]:
+        """
+        Fill in results for posts that do not need a Bedrock call.
+        
+        Empty and link-only posts are classified as neutral with reduced
+        confidence. Posts whose normalized text is already cached are served
+        from the cache when caching is enabled. Posts that repeat an earlier
+        post's text in the same batch are not sent to Bedrock, with or without
+        the cache; they reuse that post's result in _merge_fresh.
+        
+        Args:
+            posts: List of SocialMediaPost objects
+            
+        Returns:
+            Tuple of (results by post index with None for posts sent to
+            Bedrock, indices of posts that still need Bedrock, normalized
+            text key per post (empty for empty and link-only posts),
+            (duplicate index, first index) pairs for repeated texts)
+        """
+        now = batch_timestamp()
+        results: List[Optional[SentimentResult]] = []
+        pending = []
+        keys = []
+        first_seen: Dict[str, int] = {}
+        duplicates = []
+        trivial = 0
+        for idx, post in enumerate(posts):
+            content = post.content
+            if not content or content.isspace() or _URL_ONLY_RE.fullmatch(content):
+                results.append(SentimentResult.from_trusted(
+                    post_id=post.id,
+                    sentiment="neutral",
+                    sentiment_score=0.0,
+                    confidence=0.5,
+                    timestamp=now
+                ))
+                keys.append('')
+                trivial += 1
+                continue
+            
+            key = _cache_key(content)
+            keys.append(key)
+            cached = _SENTIMENT_CACHE.get(key) if self.use_cache else None
+            if cached is None:
+                results.append(None)
+                first_idx = first_seen.setdefault(key, idx)
+                if first_idx == idx:
+                    pending.append(idx)
+                else:
+                    duplicates.append((idx, first_idx))
+            else:
+                sentiment, score = cached
+                results.append(SentimentResult.from_trusted(
+                    post_id=post.id,
+                    sentiment=sentiment,
+                    sentiment_score=score,
+                    confidence=1.0,
+                    timestamp=now
+                ))
+        
+        if trivial:
+            logger.info("Classified %d empty or link-only posts as neutral", trivial)
+        if not self.use_cache:
+            if duplicates:
+                logger.info("%d of %d posts repeated in batch", len(duplicates), len(posts))
+            return results, pending, keys, duplicates
+        
+        if len(pending) + trivial < len(posts):
+            logger.info(
+                "Sentiment cache hit for %d of %d posts (%d repeated in batch)",
+                len(posts) - len(pending) - len(duplicates) - trivial, len(posts),
+                len(duplicates)
+            )
+        return results, pending, keys, duplicates
+    
+    def _merge_fresh(
+        self,
+        results: List[Optional[SentimentResult]],
+        pending: List[int],
+        keys: List[str],
+        fresh_results: List[SentimentResult],
+        posts: List[Any],
+        duplicates: List[Tuple[int, int]]
+    ) -> None:
+        """
+        Place Bedrock results at their post indices and cache confident scores.
+        
+        Neutral fallbacks for unparseable scores (confidence below 1.0) are
+        not cached, so those posts are retried on their next appearance.
+        
+        Args:
+            results: Results by post index, updated in place
+            pending: Indices of the posts that were sent to Bedrock
+            keys: Normalized text key per post, from _resolve_cached
+            fresh_results: Results from Bedrock, in the order of pending
+            posts: The analyzed posts, for the post IDs of duplicates
+            duplicates: (duplicate index, first index) pairs from _resolve_cached
+        """
+        for idx, result in zip(pending, fresh_results):
+            results[idx] = result
+            if self.use_cache and result.confidence == 1.0:
+                _SENTIMENT_CACHE.put(keys[idx], result.sentiment, result.sentiment_score)
+        
+        # Fan results for repeated texts back out to their own post IDs
+        for idx, first_idx in duplicates:
+            source = results[first_idx]
+            results[idx] = SentimentResult.from_trusted(
+                post_id=posts[idx].id,
+                sentiment=source.sentiment,
+                sentiment_score=source.sentiment_score,
+                confidence=source.confidence,
+                timestamp=source.timestamp
+            )
+    
+    def _split_batch(self, posts: List[Any]) -> List[List[Any]]:
+        """
+        Split posts into sub-batches of at most sub_batch_size posts.
+        
+        Args:
+            posts: List of SocialMediaPost objects
+            
+        Returns:
+            List of sub-batches in the original post order
+        """
+        if not self.sub_batch_size or len(posts) <= self.sub_batch_size:
+            return [posts]
+        return [
+            posts[i:i + self.sub_batch_size]
+            for i in range(0, len(posts), self.sub_batch_size)
+        ]
+    
+    def _record_duration(
+        self,
+        sentiment_results: List[SentimentResult],
+        start_ns: int
+    ) -> List[SentimentResult]:
+        """
+        Record the batch analysis time on the analyzer and log completion.
+        
+        The duration is a batch-level figure, so it is stored once in
+        last_duration_ms rather than copied onto every result.
+        
+        Args:
+            sentiment_results: Results produced for the batch
+            start_ns: time.perf_counter_ns() value when the batch started
+            
+        Returns:
+            The same list of results
+        """
+        # Calculate duration
+        duration_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
+        self.last_duration_ms = duration_ms
+        
+        logger.info(
+            "Successfully analyzed %d posts in %.2fms",
+            len(sentiment_results), duration_ms
+        )
+        
+        return sentiment_results
+    
+    async def _aanalyze_subbatch(self, client, posts: List[Any]) -> List[SentimentResult]:
+        """
+        Analyze sentiment for one sub-batch using an aiobotocore client.
+        
+        Args:
+            client: aiobotocore bedrock-runtime client
+            posts: List of SocialMediaPost objects
+            
+        Returns:
+            List of SentimentResult objects in the same order as posts
+        """
+        prompt = self._build_prompt(posts, self.structured_output)
+        response = await self._ainvoke_bedrock(client, prompt, len(posts))
+        return self._parse_response(response, posts)
+    
+    def _analyze_subbatch(self, posts: List[Any]) -> List[SentimentResult]:
+        """
+        Analyze sentiment for posts that fit in a single Bedrock call.
+        
+        Args:
+            posts: List of SocialMediaPost objects
+            
+        Returns:
+            List of SentimentResult objects in the same order as posts
+        """
+        # Construct the prompt
+        prompt = self._build_prompt(posts, self.structured_output)
+        
+        # Invoke Bedrock API (with retries)
+        response = self._invoke_bedrock(prompt, len(posts))
+        
+        # Parse response
+        return self._parse_response(response, posts)
+    
+    def _build_prompt(self, posts: List[Any], structured: bool = False) -> str:
         """
         Build an optimized prompt for Bedrock sentiment analysis.
         
@@ -241,39 +1061,179 @@ class SentimentAnalyzer:
         
         Args:
             posts: List of SocialMediaPost objects
+            structured: Leave out the output format instructions because the
+                      scores are returned through the sentiment tool
             
         Returns:
             Formatted prompt string requesting array of numeric scores
         """
         # Extract first 10 words from each post for cost optimization
-        post_texts = []
-        for post in posts:
-            words = post.content.split()[:10]  # Take only first 10 words
-            truncated_text = ' '.join(words)
-            post_texts.append(truncated_text)
+        post_texts = [_truncate_content(post.content) for post in posts]
         
-        # Create JSON array of texts (most efficient format)
-        posts_json = json.dumps(post_texts)
+        # Create compact JSON array of texts (most efficient format)
+        posts_json = json.dumps(post_texts, ensure_ascii=False, separators=(',', ':'))
         
-        # Construct minimal prompt commanding array of scores only
-        num_posts = len(posts)
-        prompt = f"""Analyze sentiment for these {num_posts} texts. Return array of {num_posts} scores.
-
-Texts: {posts_json}
-
-Return JSON array of {num_posts} numbers from -1.0 to 1.0:
-- -1.0 = very negative
-- 0.0 = neutral  
-- 1.0 = very positive
-
-CRITICAL: Return EXACTLY {num_posts} numbers in same order as texts.
-Return ONLY the JSON array, nothing else.
-
-Example: {json.dumps([0.0] * min(num_posts, 3))}"""
+        # Wrap the texts in the cached instructions for this batch size
+        prefix, suffix = _prompt_template(len(posts), structured)
+        return f"{prefix}{posts_json}{suffix}"
+    
+    def _invoke_kwargs(
+        self,
+        prompt: str,
+        expected_count: Optional[int] = None,
+        full_budget: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Build the per-call converse keyword arguments for a prompt.
         
-        return prompt
+        modelId is bound once per client, so only the message, the
+        inferenceConfig and the optional toolConfig and performanceConfig
+        vary here. The latency option is added when latency-optimized
+        inference is enabled and the model has not rejected it in this
+        process.
+        
+        Args:
+            prompt: The formatted prompt string
+            expected_count: Number of scores requested, used to size maxTokens
+            full_budget: Use the 2000-token ceiling instead of the sized
+                       maxTokens, for a retry after a cut-off answer
+            
+        Returns:
+            Per-call keyword arguments for converse
+        """
+        kwargs = {
+            'messages': [
+                {
+                    'role': 'user',
+                    'content': [{'text': prompt}]
+                }
+            ],
+            'inferenceConfig': (
+                _inference_config(expected_count, self.structured_output)
+                if expected_count and not full_budget
+                else _INFERENCE_CONFIG
+            ),
+        }
+        if self.structured_output:
+            kwargs['toolConfig'] = _SENTIMENT_TOOL_CONFIG
+        if self.latency_optimized and self.model_id not in _LATENCY_UNSUPPORTED_MODELS:
+            kwargs['performanceConfig'] = _LATENCY_OPTIMIZED
+        return kwargs
     
-    def _invoke_bedrock(self, prompt: str) -> Dict[str, Any]:
+    def _disable_latency_if_unsupported(
+        self,
+        invoke_kwargs: Dict[str, Any],
+        exception: Exception
+    ) -> bool:
+        """
+        Fall back to standard inference if the model rejected the latency option.
+        
+        A ValidationException from Bedrock, or a ParamValidationError from a
+        botocore release that predates the parameter, marks the model as
+        unsupported for the rest of the process.
+        
+        Args:
+            invoke_kwargs: Keyword arguments used for the failed call
+            exception: The exception that was raised
+            
+        Returns:
+            True if the call should be repeated without the latency option
+        """
+        if 'performanceConfig' not in invoke_kwargs:
+            return False
+        
+        if isinstance(exception, ClientError):
+            if _client_error_code(exception) != 'ValidationException':
+                return False
+        elif not isinstance(exception, ParamValidationError):
+            return False
+        
+        _LATENCY_UNSUPPORTED_MODELS.add(self.model_id)
+        logger.warning(
+            "Latency-optimized inference not available for %s: %s. "
+            "Using standard inference.",
+            self.model_id, exception
+        )
+        return True
+    
+    def _cut_off_by_sized_budget(
+        self,
+        invoke_kwargs: Dict[str, Any],
+        response: Dict[str, Any]
+    ) -> bool:
+        """
+        Check whether the answer ran out of a maxTokens sized below the ceiling.
+        
+        Such a call is repeated once with the full 2000-token budget. A reply
+        cut off at the ceiling is left to _parse_response, which rejects it.
+        
+        Args:
+            invoke_kwargs: Keyword arguments used for the call
+            response: Response returned by the call
+            
+        Returns:
+            True if the call should be repeated with the full budget
+        """
+        if response.get('stopReason') != 'max_tokens':
+            return False
+        
+        max_tokens = invoke_kwargs['inferenceConfig']['maxTokens']
+        if max_tokens >= _INFERENCE_CONFIG['maxTokens']:
+            return False
+        
+        logger.warning(
+            "Bedrock answer was cut off at maxTokens=%d. "
+            "Retrying with maxTokens=%d.",
+            max_tokens, _INFERENCE_CONFIG['maxTokens']
+        )
+        return True
+    
+    def _converse_streaming(
+        self,
+        invoke_kwargs: Dict[str, Any],
+        expected_count: int
+    ) -> Dict[str, Any]:
+        """
+        Call converse_stream and stop reading once every score has arrived.
+        
+        The model's text deltas are collected until expected_count complete
+        score lines have been seen, so trailing tokens are not waited for.
+        
+        Args:
+            invoke_kwargs: Per-call keyword arguments from _invoke_kwargs
+            expected_count: Number of scores the prompt asked for
+            
+        Returns:
+            Response in the converse output shape expected by _parse_response,
+            with the stopReason if the stream ran to its end
+        """
+        stream = self._invoke_stream(**invoke_kwargs)['stream']
+        parts = []
+        stop_reason = None
+        try:
+            for event in stream:
+                block_delta = event.get('contentBlockDelta')
+                if block_delta is None:
+                    if 'messageStop' in event:
+                        stop_reason = event['messageStop'].get('stopReason')
+                    continue
+                text = block_delta['delta'].get('text', '')
+                parts.append(text)
+                if '\n' in text and _count_scores(''.join(parts)) >= expected_count:
+                    break
+        finally:
+            stream.close()
+        
+        return {
+            'output': {'message': {'content': [{'text': ''.join(parts)}]}},
+            'stopReason': stop_reason
+        }
+    
+    def _invoke_bedrock(
+        self,
+        prompt: str,
+        expected_count: Optional[int] = None
+    ) -> Dict[str, Any]:
         """
         Invoke the Bedrock API with the constructed prompt.
         
@@ -283,6 +1243,8 @@ Example: {json.dumps([0.0] * min(num_posts, 3))}"""
         
         Args:
             prompt: The formatted prompt string
+            expected_count: Number of scores requested, used to end a
+                          streamed response early
             
         Returns:
             Parsed response from Bedrock
@@ -290,57 +1252,49 @@ Example: {json.dumps([0.0] * min(num_posts, 3))}"""
         Raises:
             Exception: If API call fails after all retry attempts
         """
-        # Construct the request body for Nova Micro
-        request_body = {
-            "messages": [
-                {
-                    "role": "user",
-                    "content": [{"text": prompt}]
-                }
-            ],
-            "inferenceConfig": {
-                "temperature": 0.0,  # Deterministic results
-                "maxTokens": 2000,   # Sufficient for batch responses
-                "topP": 1.0
-            }
-        }
-        
         # Retry loop with exponential backoff
         attempt = 0
         last_exception = None
+        full_budget = False
         
         while attempt <= self.backoff.max_retries:
+            invoke_kwargs = self._invoke_kwargs(prompt, expected_count, full_budget)
             try:
-                # Invoke the model
-                response = self.bedrock_client.invoke_model(
-                    modelId=self.model_id,
-                    body=json.dumps(request_body),
-                    contentType="application/json",
-                    accept="application/json"
-                )
+                # Invoke the model; converse returns the parsed response
+                if self.stream_response and expected_count:
+                    response = self._converse_streaming(invoke_kwargs, expected_count)
+                else:
+                    response = self._invoke(**invoke_kwargs)
                 
-                # Parse the response
-                response_body = json.loads(response['body'].read())
+                # Repeat a cut-off answer once with room for every score
+                if self._cut_off_by_sized_budget(invoke_kwargs, response):
+                    full_budget = True
+                    continue
                 
                 # Success - log if this was a retry
                 if attempt > 0:
                     logger.info(
-                        f"Bedrock API call succeeded on attempt {attempt + 1}"
+                        "Bedrock API call succeeded on attempt %d", attempt + 1
                     )
                 
-                return response_body
+                return response
                 
             except Exception as e:
                 last_exception = e
                 
+                # Retry immediately without the latency option if it was rejected
+                if self._disable_latency_if_unsupported(invoke_kwargs, e):
+                    continue
+                
                 # Check if we should retry
                 if self.backoff.should_retry(attempt, e):
                     # Calculate delay
-                    delay = self.backoff.get_delay(attempt)
+                    delay = self.backoff.get_retry_delay(attempt, e)
                     
                     logger.warning(
-                        f"Bedrock API call failed (attempt {attempt + 1}): {e}. "
-                        f"Retrying in {delay:.3f}s..."
+                        "Bedrock API call failed (attempt %d): %s. "
+                        "Retrying in %.3fs...",
+                        attempt + 1, e, delay
                     )
                     
                     # Wait before retrying
@@ -349,13 +1303,90 @@ Example: {json.dumps([0.0] * min(num_posts, 3))}"""
                 else:
                     # Non-retryable error or max retries exceeded
                     logger.error(
-                        f"Bedrock API call failed after {attempt + 1} attempts: {e}"
+                        "Bedrock API call failed after %d attempts: %s",
+                        attempt + 1, e
                     )
                     raise
         
         # If we get here, we've exhausted all retries
         logger.error(
-            f"Bedrock API call failed after {self.backoff.max_retries + 1} attempts"
+            "Bedrock API call failed after %d attempts",
+            self.backoff.max_retries + 1
+        )
+        raise last_exception
+    
+    async def _ainvoke_bedrock(
+        self,
+        client,
+        prompt: str,
+        expected_count: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Invoke the Bedrock API without blocking the event loop.
+        
+        Same request and retry behavior as _invoke_bedrock, but awaits the
+        aiobotocore call and sleeps with asyncio.sleep between retries.
+        
+        Args:
+            client: aiobotocore bedrock-runtime client
+            prompt: The formatted prompt string
+            expected_count: Number of scores requested, used to size maxTokens
+            
+        Returns:
+            Parsed response from Bedrock
+            
+        Raises:
+            Exception: If API call fails after all retry attempts
+        """
+        invoke = partial(client.converse, modelId=self.model_id)
+        
+        attempt = 0
+        last_exception = None
+        full_budget = False
+        
+        while attempt <= self.backoff.max_retries:
+            invoke_kwargs = self._invoke_kwargs(prompt, expected_count, full_budget)
+            try:
+                response = await invoke(**invoke_kwargs)
+                
+                if self._cut_off_by_sized_budget(invoke_kwargs, response):
+                    full_budget = True
+                    continue
+                
+                if attempt > 0:
+                    logger.info(
+                        "Bedrock API call succeeded on attempt %d", attempt + 1
+                    )
+                
+                return response
+                
+            except Exception as e:
+                last_exception = e
+                
+                if self._disable_latency_if_unsupported(invoke_kwargs, e):
+                    continue
+                
+                if self.backoff.should_retry(attempt, e):
+                    delay = self.backoff.get_retry_delay(attempt, e)
+                    
+                    logger.warning(
+                        "Bedrock API call failed (attempt %d): %s. "
+                        "Retrying in %.3fs...",
+                        attempt + 1, e, delay
+                    )
+                    
+                    await asyncio.sleep(delay)
+                    attempt += 1
+                else:
+                    logger.error(
+                        "Bedrock API call failed after %d attempts: %s",
+                        attempt + 1, e
+                    )
+                    raise
+        
+        logger.error(
+            "Bedrock API call failed after %d attempts",
+            self.backoff.max_retries + 1
         )
         raise last_exception
     
@@ -367,8 +1398,12 @@ Example: {json.dumps([0.0] * min(num_posts, 3))}"""
         """
         Parse Bedrock response into SentimentResult objects.
         
-        Correlates results by array index since we send texts without IDs.
-        Expects a simple array of numeric scores from the model.
+        Correlates results by index since we send texts without IDs.
+        Scores come from the sentiment tool call when structured output is
+        enabled. Otherwise one numeric score per line is expected, with a
+        fallback to a JSON array if the model answers in that format instead.
+        A response that stopped at the maxTokens limit is rejected rather
+        than padded.
         
         Args:
             response: Raw response from Bedrock API
@@ -393,21 +1428,21 @@ Example: {json.dumps([0.0] * min(num_posts, 3))}"""
             if 'content' not in message or not message['content']:
                 raise ValueError("Response message missing 'content' field")
             
-            # Get the text content
-            content = message['content'][0]
-            if 'text' not in content:
-                raise ValueError("Response content missing 'text' field")
-            
-            text = content['text'].strip()
-            
-            # Extract JSON array from the text
-            json_text = self._extract_json(text)
-            
-            # Parse the JSON array
-            sentiment_data = json.loads(json_text)
+            # A cut-off answer is missing scores; padding it would record
+            # made-up neutral results as real sentiment
+            if response.get('stopReason') == 'max_tokens':
+                raise ValueError("Response was cut off at the maxTokens limit")
             
-            if not isinstance(sentiment_data, list):
-                raise ValueError(f"Expected JSON array, got {type(sentiment_data)}")
+            # Prefer the validated tool input; the model may put a text block
+            # before the tool call, so look at every block
+            sentiment_data = self._tool_scores(message['content'])
+            if sentiment_data is None:
+                content = message['content'][0]
+                if 'text' not in content:
+                    raise ValueError("Response content missing 'text' field")
+                
+                # Parse the scores from the text
+                sentiment_data = self._parse_scores(content['text'])
             
             # Handle count mismatch by padding with neutral scores if needed
             expected_count = len(posts)
@@ -415,81 +1450,130 @@ Example: {json.dumps([0.0] * min(num_posts, 3))}"""
             
             if actual_count < expected_count:
                 logger.warning(
-                    f"Model returned {actual_count} scores but expected {expected_count}. "
-                    f"Padding with neutral scores (0.0) for missing results."
+                    "Model returned %d scores but expected %d. "
+                    "Padding with neutral scores (0.0) for missing results.",
+                    actual_count, expected_count
                 )
                 # Pad with neutral scores for missing posts
                 sentiment_data.extend([0.0] * (expected_count - actual_count))
             elif actual_count > expected_count:
                 logger.warning(
-                    f"Model returned {actual_count} scores but expected {expected_count}. "
-                    f"Truncating extra results."
+                    "Model returned %d scores but expected %d. "
+                    "Truncating extra results.",
+                    actual_count, expected_count
                 )
                 # Truncate extra scores
                 sentiment_data = sentiment_data[:expected_count]
             
-            # Correlate results by index with original posts
-            results = []
-            for idx, score in enumerate(sentiment_data):
+            # All results in the batch share one analysis timestamp
+            now = batch_timestamp()
+            
+            # Correlate results by index with original posts (the scores were
+            # padded/truncated above, so zip pairs every post with one score and
+            # every index below receives a result)
+            results: List[SentimentResult] = [None] * expected_count
+            for idx, (post, score) in enumerate(zip(posts, sentiment_data)):
                 try:
-                    # Validate index is within bounds
-                    if idx >= len(posts):
-                        logger.warning(f"Result index {idx} exceeds post count {len(posts)}")
-                        break
-                    
-                    # Get corresponding post by index
-                    post = posts[idx]
-                    
-                    # Convert score to float
-                    score_value = float(score)
-                    
-                    # Clamp score to valid range
-                    score_value = max(-1.0, min(1.0, score_value))
+                    # Convert score to float and clamp to valid range
+                    score_value = max(-1.0, min(1.0, float(score)))
                     
                     # Determine sentiment category from score
-                    if score_value > 0.1:
-                        sentiment = "positive"
-                    elif score_value < -0.1:
-                        sentiment = "negative"
-                    else:
-                        sentiment = "neutral"
+                    sentiment = (
+                        "positive" if score_value > _NEUTRAL_BAND
+                        else "negative" if score_value < -_NEUTRAL_BAND
+                        else "neutral"
+                    )
                     
                     # Create SentimentResult with post_id from original post
-                    result = SentimentResult(
+                    results[idx] = SentimentResult.from_trusted(
                         post_id=post.id,
                         sentiment=sentiment,
                         sentiment_score=score_value,
                         confidence=1.0,  # Default confidence since we don't get it from model
-                        timestamp=datetime.utcnow()
+                        timestamp=now
                     )
-                    results.append(result)
                 except (ValueError, TypeError) as e:
-                    logger.warning(f"Failed to parse sentiment score at index {idx}: {score}. Error: {e}. Using neutral score.")
+                    logger.warning(
+                        "Failed to parse sentiment score at index %d: %s. "
+                        "Error: %s. Using neutral score.",
+                        idx, score, e
+                    )
                     # Add neutral result for failed parsing
-                    if idx < len(posts):
-                        post = posts[idx]
-                        result = SentimentResult(
-                            post_id=post.id,
-                            sentiment="neutral",
-                            sentiment_score=0.0,
-                            confidence=0.5,  # Lower confidence for fallback
-                            timestamp=datetime.utcnow()
-                        )
-                        results.append(result)
-                    continue
+                    results[idx] = SentimentResult.from_trusted(
+                        post_id=post.id,
+                        sentiment="neutral",
+                        sentiment_score=0.0,
+                        confidence=0.5,  # Lower confidence for fallback
+                        timestamp=now
+                    )
             
             # Log final result count
-            logger.info(f"Successfully created {len(results)} sentiment results from {len(posts)} posts")
+            logger.info(
+                "Successfully created %d sentiment results from %d posts",
+                len(results), len(posts)
+            )
             
             return results
             
         except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse JSON from response: {e}")
+            logger.error("Failed to parse JSON from response: %s", e)
             raise ValueError(f"Invalid JSON in Bedrock response: {e}")
         except Exception as e:
-            logger.error(f"Failed to parse Bedrock response: {e}")
+            logger.error("Failed to parse Bedrock response: %s", e)
             raise ValueError(f"Failed to parse response: {e}")
     
+    def _tool_scores(self, content: List[Dict[str, Any]]) -> Optional[List[Any]]:
+        """
+        Get the score list from a sentiment tool call in the response content.
+        
+        Args:
+            content: Content blocks of the model's response message
+            
+        Returns:
+            List of scores in post order, or None if the model did not call
+            the sentiment tool
+            
+        Raises:
+            ValueError: If the tool input has no score list
+        """
+        for block in content:
+            tool_use = block.get('toolUse')
+            if tool_use is None or tool_use.get('name') != _SENTIMENT_TOOL_NAME:
+                continue
+            scores = tool_use.get('input', {}).get('scores')
+            if not isinstance(scores, list):
+                raise ValueError(f"Expected 'scores' array in tool input, got {type(scores)}")
+            return scores
+        return None
+    
+    def _parse_scores(self, text: str) -> List[Any]:
+        """
+        Parse the model's score list from its response text.
+        
+        The prompt asks for one number per line, which splits and converts
+        without a JSON parser. Anything else (a JSON array, markdown fences)
+        goes through _extract_json.
+        
+        Args:
+            text: Raw text from model response
+            
+        Returns:
+            List of scores in post order
+            
+        Raises:
+            ValueError: If no score list can be found in the text
+        """
+        try:
+            return [float(token) for token in text.split()]
+        except ValueError:
+            pass
+        
+        # Fall back to a JSON array anywhere in the text
+        sentiment_data = _json_loads(self._extract_json(text.strip()))
+        if not isinstance(sentiment_data, list):
+            raise ValueError(f"Expected JSON array, got {type(sentiment_data)}")
+        return sentiment_data
+    
     def _extract_json(self, text: str) -> str:
         """
         Extract JSON array from text that might contain markdown or other formatting.
@@ -512,11 +1596,60 @@ Example: {json.dumps([0.0] * min(num_posts, 3))}"""
             if end != -1:
                 text = text[start:end].strip()
         
-        # Find the JSON array boundaries
+        # Find the start of the first JSON array
         start_idx = text.find('[')
-        end_idx = text.rfind(']')
+        if start_idx == -1:
+            raise ValueError("No JSON array found in response text")
         
-        if start_idx == -1 or end_idx == -1:
+        # Fast path: the expected flat score array closes at the first ']'
+        end_idx = text.find(']', start_idx)
+        if end_idx == -1:
             raise ValueError("No JSON array found in response text")
         
-        return text[start_idx:end_idx + 1]
+        inner = text[start_idx + 1:end_idx]
+        if '[' not in inner and '"' not in inner:
+            return text[start_idx:end_idx + 1]
+        
+        # Nested arrays or strings: scan forward for the matching ']'
+        return self._scan_json_array(text, start_idx)
+    
+    def _scan_json_array(self, text: str, start_idx: int) -> str:
+        """
+        Find the JSON array starting at start_idx by tracking bracket depth.
+        
+        Brackets inside string literals are ignored. Stops at the first
+        balanced closing bracket.
+        
+        Args:
+            text: Text containing the array
+            start_idx: Index of the opening '['
+            
+        Returns:
+            The balanced JSON array text
+            
+        Raises:
+            ValueError: If the array is never closed
+        """
+        depth = 0
+        in_string = False
+        escaped = False
+        
+        for idx in range(start_idx, len(text)):
+            char = text[idx]
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif char == '\\':
+                    escaped = True
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char == '[':
+                depth += 1
+            elif char == ']':
+                depth -= 1
+                if depth == 0:
+                    return text[start_idx:idx + 1]
+        
+        raise ValueError("No JSON array found in response text")
@@ -7,8 +7,8 @@ to and from JSON format, following the same patterns as the shared serialization
 
 import json
 from datetime import datetime
-from typing import Any, Dict, Type, TypeVar
-from dataclasses import asdict, is_dataclass
+from typing import Any, Dict, Tuple, Type, TypeVar
+from dataclasses import fields, is_dataclass
 
 try:
     from .models import (
@@ -31,8 +31,26 @@ except ImportError:
         BatchProcessingMetrics,
     )
 
+# orjson encodes dataclasses and datetimes natively; fall back to the
+# standard library encoder when it is not installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 T = TypeVar('T')
 
+# Field names per dataclass type, so the encoder does not call fields() per object
+_FIELD_NAMES: Dict[type, Tuple[str, ...]] = {}
+
+
+def _field_names(cls: type) -> Tuple[str, ...]:
+    """Return the cached field names of a dataclass type."""
+    names = _FIELD_NAMES.get(cls)
+    if names is None:
+        names = _FIELD_NAMES[cls] = tuple(f.name for f in fields(cls))
+    return names
+
 
 class SentimentJSONEncoder(json.JSONEncoder):
     """Custom JSON encoder for sentiment analysis data types."""
@@ -42,10 +60,16 @@ class SentimentJSONEncoder(json.JSONEncoder):
         if isinstance(obj, datetime):
             return obj.isoformat()
         elif is_dataclass(obj):
-            return asdict(obj)
+            # Shallow dict; the encoder recurses into nested values itself,
+            # so the deep copy made by asdict() is not needed
+            return {name: getattr(obj, name) for name in _field_names(type(obj))}
         return super().default(obj)
 
 
+# Stdlib fallback encoder, built once; compact separators match orjson output
+_ENCODER = SentimentJSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+
 def serialize_to_json(obj: Any) -> str:
     """
     Serialize an object to JSON string.
@@ -59,8 +83,10 @@ def serialize_to_json(obj: Any) -> str:
     Raises:
         ValueError: If serialization fails
     """
+    if orjson is not None:
+        return serialize_to_bytes(obj).decode('utf-8')
     try:
-        return json.dumps(obj, cls=SentimentJSONEncoder, ensure_ascii=False)
+        return _ENCODER.encode(obj)
     except (TypeError, ValueError) as e:
         raise ValueError(f"Failed to serialize object to JSON: {e}")
 
@@ -78,6 +104,12 @@ def serialize_to_bytes(obj: Any) -> bytes:
     Raises:
         ValueError: If serialization fails
     """
+    if orjson is not None:
+        # orjson produces UTF-8 bytes directly, with no intermediate str
+        try:
+            return orjson.dumps(obj)
+        except TypeError as e:
+            raise ValueError(f"Failed to serialize object to JSON: {e}")
     json_str = serialize_to_json(obj)
     return json_str.encode('utf-8')
 
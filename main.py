@@ -7,17 +7,29 @@ with phase-based traffic control and comprehensive monitoring.
 """
 
 import asyncio
+import json
 import logging
+import os
+import random
 import signal
 import sys
 import time
+from collections import deque
 from datetime import datetime
 from typing import Optional
 
+# uvloop is optional; it replaces the default event loop when installed
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 from shared.config import DemoConfig
 from shared.post_generator import SocialMediaPostGenerator, TrafficPatternController
 from shared.kinesis_producer import KinesisProducer
 from shared.models import PostType
+from shared.env_phase_controller import EnvironmentTrafficPatternController
+from shared.stepfunctions_phase_controller import StepFunctionsTrafficPatternController
 
 
 # Configure logging
@@ -31,6 +43,36 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+class MetricsJSONFormatter(logging.Formatter):
+    """Format metrics records as one JSON object per line.
+    
+    Uses record.created directly instead of formatting asctime, and emits
+    the record's ``metrics`` dict as fields that log queries can filter on.
+    """
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {'t': round(record.created, 3), 'event': record.getMessage()}
+        entry.update(getattr(record, 'metrics', {}))
+        return json.dumps(entry, separators=(',', ':'))
+
+
+# Periodic demo metrics go to their own logger with the JSON formatter
+metrics_logger = logging.getLogger('demo.metrics')
+metrics_logger.propagate = False
+_metrics_handler = logging.StreamHandler(sys.stdout)
+_metrics_handler.setFormatter(MetricsJSONFormatter())
+metrics_logger.addHandler(_metrics_handler)
+
+# Runtime options, read once when the container starts
+CONTROLLER_MODE = os.environ.get('CONTROLLER_MODE', 'internal').lower()
+SERVICE_NAME = os.environ.get('SERVICE_NAME', 'kinesis-ondemand-demo-service')
+ENABLE_CLOUDWATCH_METRICS = os.environ.get('ENABLE_CLOUDWATCH_METRICS', 'true').lower() == 'true'
+METRICS_PUBLISH_INTERVAL = int(os.environ.get('METRICS_PUBLISH_INTERVAL', '10'))
+
+# Post types in the order of the controller's (original, share, reply) distribution
+_POST_TYPES = (PostType.ORIGINAL, PostType.SHARE, PostType.REPLY)
+
+
 class DemoDataGenerator:
     """
     Main data generator application that orchestrates the entire demo flow.
@@ -53,45 +95,59 @@ class DemoDataGenerator:
         self.post_generator = SocialMediaPostGenerator(config)
         
         # Choose traffic controller based on configuration
-        import os
-        controller_mode = os.getenv('CONTROLLER_MODE', 'internal').lower()
-        
-        if controller_mode == 'step_functions':
-            from shared.env_phase_controller import EnvironmentTrafficPatternController
+        if CONTROLLER_MODE == 'step_functions':
             self.traffic_controller = EnvironmentTrafficPatternController(config)
             logger.info("Using Step Functions controller with environment variables for phase management")
-        elif controller_mode == 'step_functions_polling':
+        elif CONTROLLER_MODE == 'step_functions_polling':
             # Legacy polling mode - kept for backward compatibility
-            from shared.stepfunctions_phase_controller import StepFunctionsTrafficPatternController
-            service_name = os.getenv('SERVICE_NAME', 'kinesis-ondemand-demo-service')
-            self.traffic_controller = StepFunctionsTrafficPatternController(config, service_name)
+            self.traffic_controller = StepFunctionsTrafficPatternController(config, SERVICE_NAME)
             logger.info("Using Step Functions controller with CloudWatch polling for phase management")
 
         else:
-            from shared.post_generator import TrafficPatternController
             self.traffic_controller = TrafficPatternController(config)
             logger.info("Using internal phase management")
         
         self.kinesis_producer: Optional[KinesisProducer] = None
         
         # Demo state tracking
-        self.demo_start_time: Optional[datetime] = None
+        self.demo_start_time: Optional[float] = None  # time.monotonic() at start
+        self.demo_start_iso: Optional[str] = None  # Wall-clock start, for display
         self.current_phase = 1
         self.total_messages_sent = 0
+        
+        # Per-phase values read once per loop iteration or phase change
+        # instead of on every batch
+        self.target_tps = 0
+        self.post_type_weights = None  # Cumulative (original, share, reply) weights
         self.total_messages_failed = 0
         
         # Performance tracking
         self.last_metrics_log = time.time()
         self.metrics_log_interval = 30  # Log metrics every 30 seconds
+        self.last_debug_log = time.monotonic()
+        self.debug_log_interval = 5.0  # Throughput debug line every 5 seconds
         
         # TPS tracking for metrics only
         self.tps_window_start = time.time()
         self.tps_window_messages = 0
         
         # Sliding window for accurate TPS calculation (last 30 seconds)
-        self.tps_sliding_window = []  # List of (timestamp, message_count) tuples
+        # Batches are counted in one-second buckets, so the window holds at
+        # most ~30 entries at any batch rate. Oldest buckets are dropped from
+        # the left as they expire, and the message total is kept alongside so
+        # it is never re-summed
+        self.tps_sliding_window = deque()  # (second, message_count) tuples
+        self.tps_window_total = 0
         self.tps_window_duration = 30.0  # 30-second sliding window
         
+        # Batches handed to the producer but not yet confirmed, so the next
+        # batch is generated while earlier ones are on the network. The
+        # producer only holds its batch lock while building records, so each
+        # task's PutRecords call runs concurrently with the others; the bound
+        # keeps them within botocore's default pool of 10 connections
+        self.inflight_sends = deque()  # asyncio.Task per send_posts_batch call
+        self.max_inflight_sends = 8
+        
         logger.info(f"DemoDataGenerator initialized with config: {config}")
     
     async def start(self) -> None:
@@ -104,25 +160,22 @@ class DemoDataGenerator:
         
         try:
             # Initialize Kinesis producer with environment-based configuration
-            import os
-            enable_cloudwatch = os.getenv('ENABLE_CLOUDWATCH_METRICS', 'true').lower() == 'true'
-            metrics_interval = int(os.getenv('METRICS_PUBLISH_INTERVAL', '10'))
-            
             self.kinesis_producer = KinesisProducer(
                 config=self.config,
                 max_batch_size=500,  # Kinesis PutRecords API limit
                 max_batch_wait_ms=25,  # Reduced timeout for higher throughput
                 enable_metrics=True,
-                enable_cloudwatch_publishing=enable_cloudwatch,
-                metrics_publish_interval=metrics_interval
+                enable_cloudwatch_publishing=ENABLE_CLOUDWATCH_METRICS,
+                metrics_publish_interval=METRICS_PUBLISH_INTERVAL
             )
             
             # Start the demo
             self.is_running = True
-            self.demo_start_time = datetime.utcnow()
+            self.demo_start_time = time.monotonic()
+            self.demo_start_iso = datetime.utcnow().isoformat()
             self.traffic_controller.start_demo()
             
-            logger.info(f"Demo started at {self.demo_start_time}")
+            logger.info(f"Demo started at {self.demo_start_iso}")
             logger.info(f"Total demo duration: {self.config.get_total_demo_duration()} seconds")
             
             # Start producer with metrics publishing
@@ -149,7 +202,11 @@ class DemoDataGenerator:
                 
                 # Get current phase and update producer
                 current_phase = self.traffic_controller.get_current_phase()
-                if current_phase.phase_number != self.current_phase:
+                self.target_tps = current_phase.target_tps
+                phase_changed = current_phase.phase_number != self.current_phase
+                if phase_changed or self.post_type_weights is None:
+                    self.post_type_weights = self._cumulative_post_type_weights()
+                if phase_changed:
                     self.current_phase = current_phase.phase_number
                     self.kinesis_producer.set_demo_phase(self.current_phase)
                     logger.info(f"Transitioned to demo phase {self.current_phase}")
@@ -172,43 +229,96 @@ class DemoDataGenerator:
                 logger.error(f"Error in demo loop: {e}")
                 # Continue running unless it's a critical error
                 await asyncio.sleep(1)
+        
+        # Give outstanding sends a bounded time to finish before the producer
+        # is closed
+        await self._drain_inflight_sends()
     
     async def _generate_and_send_posts(self) -> None:
         """Generate and send posts at maximum compute capacity - no rate limiting."""
-        target_tps = self.traffic_controller.get_target_tps()
-        
-        if target_tps == 0:
+        if self.target_tps == 0:
             return
         
-        # Get post type distribution for current phase
-        original_pct, share_pct, reply_pct = self.traffic_controller.get_post_type_distribution()
-        
         # Generate posts in maximum batches for highest throughput
         batch_size = 500  # Always use maximum Kinesis batch size
         messages_to_send = batch_size
         
+        # Draw the post type of every message in one call
+        post_types = random.choices(
+            _POST_TYPES,
+            cum_weights=self.post_type_weights,
+            k=messages_to_send
+        )
+        
         # Generate batch of posts
-        batch_posts = []
-        for _ in range(messages_to_send):
-            # Determine post type based on distribution
-            rand_val = time.time() % 1.0  # Use time-based randomness
-            if rand_val < original_pct:
-                post_type = PostType.ORIGINAL
-            elif rand_val < original_pct + share_pct:
-                post_type = PostType.SHARE
-            else:
-                post_type = PostType.REPLY
-            
-            # Generate post
-            post = self.post_generator.generate_post(
-                phase=self.current_phase,
-                post_type=post_type
+        generate_post = self.post_generator.generate_post
+        batch_posts = [
+            generate_post(phase=self.current_phase, post_type=post_type)
+            for post_type in post_types
+        ]
+        
+        # Send batch to Kinesis without waiting for it; only block once the
+        # maximum number of batches is in flight
+        self.inflight_sends.append(
+            asyncio.create_task(self.kinesis_producer.send_posts_batch(batch_posts))
+        )
+        if len(self.inflight_sends) < self.max_inflight_sends:
+            return
+        
+        await asyncio.wait(self.inflight_sends, return_when=asyncio.FIRST_COMPLETED)
+        self._collect_finished_sends()
+        
+        # Log throughput info periodically for monitoring
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        current_time = time.monotonic()
+        if current_time - self.last_debug_log >= self.debug_log_interval:
+            self.last_debug_log = current_time
+            tps_metrics = self._get_tps_metrics()
+            logger.debug(
+                "Max throughput mode: current_tps=%.1f, recent_tps=%.1f, efficiency=%.1f%%",
+                tps_metrics['current_tps'], tps_metrics['recent_tps'],
+                tps_metrics['efficiency_percent']
             )
-            batch_posts.append(post)
+    
+    def _collect_finished_sends(self) -> None:
+        """Record the results of in-flight batches that have completed."""
+        still_running = deque()
+        for task in self.inflight_sends:
+            if not task.done():
+                still_running.append(task)
+                continue
+            try:
+                successful, failed = task.result()
+            except Exception as e:
+                logger.error(f"Error sending batch: {e}")
+                continue
+            self._record_sent_batch(successful, failed)
+        self.inflight_sends = still_running
+    
+    async def _drain_inflight_sends(self, timeout: float = 2.0) -> None:
+        """Wait a bounded time for in-flight batches, then cancel the rest."""
+        if not self.inflight_sends:
+            return
         
-        # Send batch to Kinesis
-        successful, failed = await self.kinesis_producer.send_posts_batch(batch_posts)
+        await asyncio.wait(self.inflight_sends, timeout=timeout)
+        self._collect_finished_sends()
+        if not self.inflight_sends:
+            return
         
+        # Sends still retrying after the timeout are abandoned so shutdown
+        # does not wait out their backoff
+        logger.warning(
+            "Cancelling %d in-flight batches still sending after %.1fs",
+            len(self.inflight_sends), timeout
+        )
+        for task in self.inflight_sends:
+            task.cancel()
+        await asyncio.wait(self.inflight_sends)
+        self.inflight_sends.clear()
+    
+    def _record_sent_batch(self, successful: int, failed: int) -> None:
+        """Update message counters and the TPS window for a completed batch."""
         # Update counters
         self.total_messages_sent += successful
         self.total_messages_failed += failed
@@ -217,34 +327,48 @@ class DemoDataGenerator:
         self.tps_window_messages += successful
         
         # Add to sliding window for accurate TPS calculation
-        current_time = time.time()
-        self.tps_sliding_window.append((current_time, successful))
+        current_time = time.monotonic()
+        bucket = int(current_time)
+        window = self.tps_sliding_window
+        if window and window[-1][0] == bucket:
+            window[-1] = (bucket, window[-1][1] + successful)
+        else:
+            window.append((bucket, successful))
+        self.tps_window_total += successful
         
-        # Log throughput info periodically for monitoring
-        if self.total_messages_sent % (batch_size * 20) == 0:  # Every 20 batches
-            tps_metrics = self._get_tps_metrics()
-            logger.debug(f"Max throughput mode: "
-                       f"current_tps={tps_metrics['current_tps']:.1f}, "
-                       f"recent_tps={tps_metrics['recent_tps']:.1f}, "
-                       f"efficiency={tps_metrics['efficiency_percent']:.1f}%")
+        # Expire old entries here too, so the window stays bounded even when
+        # the metrics that read it are not being logged
+        cutoff_time = current_time - self.tps_window_duration
+        while window[0][0] < cutoff_time:
+            self.tps_window_total -= window.popleft()[1]
+    
+    def _cumulative_post_type_weights(self) -> tuple:
+        """Get the current phase's post type distribution as cumulative weights."""
+        original_pct, share_pct, _ = self.traffic_controller.get_post_type_distribution()
+        # Anything beyond original + share is a reply
+        return (
+            original_pct,
+            original_pct + share_pct,
+            max(1.0, original_pct + share_pct)
+        )
     
     def _get_current_tps(self) -> float:
         """Calculate current TPS based on sliding window of recent performance."""
-        current_time = time.time()
+        current_time = time.monotonic()
         
-        # Clean up old entries outside the sliding window
+        # Drop expired entries; timestamps are appended in order, so they
+        # are all at the left end
         cutoff_time = current_time - self.tps_window_duration
-        self.tps_sliding_window = [
-            (timestamp, count) for timestamp, count in self.tps_sliding_window
-            if timestamp >= cutoff_time
-        ]
+        window = self.tps_sliding_window
+        while window and window[0][0] < cutoff_time:
+            self.tps_window_total -= window.popleft()[1]
         
         # Calculate TPS from sliding window
-        if not self.tps_sliding_window:
+        if not window:
             return 0.0
         
-        # Sum messages in the sliding window
-        total_messages = sum(count for _, count in self.tps_sliding_window)
+        # Messages in the sliding window
+        total_messages = self.tps_window_total
         
         # Calculate actual time span of the window
         if len(self.tps_sliding_window) == 1:
@@ -258,35 +382,30 @@ class DemoDataGenerator:
     
     def _get_tps_metrics(self) -> dict:
         """Get detailed TPS metrics for monitoring and CloudWatch."""
-        current_time = time.time()
+        current_time = time.monotonic()
         
         # Get current TPS from sliding window
         current_tps = self._get_current_tps()
         
         # Calculate overall average TPS
         overall_tps = 0.0
-        if self.demo_start_time:
-            # Handle both datetime and float timestamp formats
-            if hasattr(self.demo_start_time, 'timestamp'):
-                start_timestamp = self.demo_start_time.timestamp()
-            else:
-                start_timestamp = self.demo_start_time
-            
-            total_duration = current_time - start_timestamp
+        if self.demo_start_time is not None:
+            total_duration = current_time - self.demo_start_time
             overall_tps = self.total_messages_sent / max(total_duration, 1)
         
-        # Get target TPS
-        target_tps = self.traffic_controller.get_target_tps()
+        # Target TPS as of the last loop iteration
+        target_tps = self.target_tps
         
         # Calculate efficiency
         efficiency = (current_tps / target_tps * 100) if target_tps > 0 else 0
         
         # Calculate recent performance (last 5 seconds for immediate feedback)
         recent_cutoff = current_time - 5.0
-        recent_messages = sum(
-            count for timestamp, count in self.tps_sliding_window
-            if timestamp >= recent_cutoff
-        )
+        recent_messages = 0
+        for timestamp, count in reversed(self.tps_sliding_window):
+            if timestamp < recent_cutoff:
+                break
+            recent_messages += count
         recent_tps = recent_messages / 5.0 if recent_messages > 0 else 0.0
         
         return {
@@ -308,48 +427,58 @@ class DemoDataGenerator:
     
     async def _log_current_metrics(self) -> None:
         """Log current demo metrics."""
-        if not self.kinesis_producer:
+        if not self.kinesis_producer or not metrics_logger.isEnabledFor(logging.INFO):
             return
         
         # Get producer metrics
         producer_metrics = self.kinesis_producer.get_metrics()
         
-        # Get demo progress
-        demo_progress = self.traffic_controller.get_demo_progress()
-        phase_progress = self.traffic_controller.get_phase_progress()
-        remaining_time = self.traffic_controller.get_remaining_time()
-        target_tps = self.traffic_controller.get_target_tps()
+        # Get demo progress off the event loop; the CloudWatch polling
+        # controller answers these with blocking GetMetricStatistics calls
+        demo_progress, phase_progress, remaining_time = await asyncio.to_thread(
+            self._get_demo_progress_snapshot
+        )
         
         # Get detailed TPS performance metrics
         tps_metrics = self._get_tps_metrics()
         
-        # Log comprehensive metrics
-        logger.info("=== DEMO METRICS ===")
-        logger.info(f"Demo Phase: {self.current_phase}/4")
-        logger.info(f"Demo Progress: {demo_progress:.1%}")
-        logger.info(f"Phase Progress: {phase_progress:.1%}")
-        logger.info(f"Remaining Time in Phase: {remaining_time}s")
-        logger.info(f"Target TPS: {tps_metrics['target_tps']}")
-        logger.info(f"Current TPS (30s avg): {tps_metrics['current_tps']:.1f} ({tps_metrics['efficiency_percent']:.1f}% of target)")
-        logger.info(f"Recent TPS (5s avg): {tps_metrics['recent_tps']:.1f}")
-        logger.info(f"Overall TPS: {tps_metrics['overall_tps']:.1f}")
-        logger.info(f"Total Messages Sent: {self.total_messages_sent}")
-        logger.info(f"Total Messages Failed: {self.total_messages_failed}")
-        logger.info(f"Producer Success Rate: {producer_metrics.get_success_rate():.1f}%")
-        logger.info(f"Producer Avg Latency: {producer_metrics.get_average_latency_ms():.1f}ms")
-        logger.info(f"Producer Avg Message Size: {producer_metrics.get_average_message_size():.1f} bytes")
-        logger.info(f"Producer Throttle Count: {producer_metrics.throttle_exceptions}")
-        logger.info(f"Producer Batch Count: {producer_metrics.batch_count}")
-        logger.info(f"TPS Window Size: {tps_metrics['sliding_window_size']} data points")
-        logger.info("==================")
+        # Log comprehensive metrics as one structured record
+        metrics_logger.info("DEMO METRICS", extra={'metrics': {
+            'phase': self.current_phase,
+            'demo_progress': round(demo_progress, 4),
+            'phase_progress': round(phase_progress, 4),
+            'remaining_time_s': remaining_time,
+            'target_tps': tps_metrics['target_tps'],
+            'current_tps': round(tps_metrics['current_tps'], 1),
+            'efficiency_percent': round(tps_metrics['efficiency_percent'], 1),
+            'recent_tps': round(tps_metrics['recent_tps'], 1),
+            'overall_tps': round(tps_metrics['overall_tps'], 1),
+            'messages_sent': self.total_messages_sent,
+            'messages_failed': self.total_messages_failed,
+            'producer_success_rate': round(producer_metrics.get_success_rate(), 1),
+            'producer_avg_latency_ms': round(producer_metrics.get_average_latency_ms(), 1),
+            'producer_avg_message_bytes': round(producer_metrics.get_average_message_size(), 1),
+            'producer_throttles': producer_metrics.throttle_exceptions,
+            'producer_batches': producer_metrics.batch_count,
+            'tps_window_size': tps_metrics['sliding_window_size'],
+        }})
+    
+    def _get_demo_progress_snapshot(self) -> tuple:
+        """Get (demo progress, phase progress, remaining time) from the controller."""
+        return (
+            self.traffic_controller.get_demo_progress(),
+            self.traffic_controller.get_phase_progress(),
+            self.traffic_controller.get_remaining_time()
+        )
     
     async def stop(self) -> None:
         """Stop the demo gracefully."""
         logger.info("Stopping demo data generator...")
         self.shutdown_requested = True
         
-        # Wait a moment for current operations to complete
-        await asyncio.sleep(1)
+        # The demo loop drains its in-flight sends before the producer is
+        # closed; this only covers a stop() that runs while the loop is live
+        await self._drain_inflight_sends()
         
         # Final metrics log
         if self.is_running:
@@ -378,7 +507,7 @@ class DemoDataGenerator:
             'remaining_time': self.traffic_controller.get_remaining_time(),
             'total_messages_sent': self.total_messages_sent,
             'total_messages_failed': self.total_messages_failed,
-            'demo_start_time': self.demo_start_time.isoformat() if self.demo_start_time else None
+            'demo_start_time': self.demo_start_iso
         }
 
 
@@ -476,4 +605,7 @@ async def main() -> None:
 
 if __name__ == "__main__":
     # Run the main application
-    asyncio.run(main())
\ No newline at end of file
+    if uvloop is not None:
+        uvloop.run(main())
+    else:
+        asyncio.run(main())
@@ -3,13 +3,32 @@ CloudWatch metrics publisher for real-time producer monitoring.
 """
 
 import asyncio
+import functools
+import http.client
+import json
 import logging
+import os
+import random
+import sys
 import time
+from collections import deque
+from contextlib import AsyncExitStack
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
+from itertools import islice
 from datetime import datetime, timezone
-from typing import Dict, List, Optional, Any
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
 import boto3
-from botocore.exceptions import ClientError, BotoCoreError
+from botocore.exceptions import (
+    ClientError, ConnectionClosedError, EndpointConnectionError, ReadTimeoutError
+)
+
+# aiobotocore is optional; it is only needed when CLOUDWATCH_ASYNC is enabled
+try:
+    from aiobotocore.session import get_session as get_aio_session
+except ImportError:
+    get_aio_session = None
 
 from .models import DemoMetrics
 from .config import DemoConfig
@@ -17,23 +36,111 @@ from .config import DemoConfig
 
 logger = logging.getLogger(__name__)
 
+# PutMetricData accepts up to 1000 metric data points per request
+CLOUDWATCH_MAX_METRICS_PER_REQUEST = 1000
+
+# PutMetricData error codes worth retrying with backoff; other errors fail fast
+RETRYABLE_ERROR_CODES = frozenset({
+    'Throttling', 'ThrottlingException', 'InternalServiceError',
+    'InternalServiceFault', 'ServiceUnavailable'
+})
+
+# Transport errors worth retrying (EndpointConnectionError covers connect timeouts)
+RETRYABLE_EXCEPTIONS = (EndpointConnectionError, ReadTimeoutError, ConnectionClosedError)
+
+# Upper bound for a single retry backoff delay, in seconds
+MAX_RETRY_DELAY_SECONDS = 30.0
+
+# Worker threads for blocking PutMetricData calls (kept off the default executor)
+PUBLISH_EXECUTOR_WORKERS = 2
+
+# While the producer is idle, publish one all-zero snapshot every this many windows
+IDLE_HEARTBEAT_WINDOWS = 6
+
+# Maximum number of distinct serialized dimension sets kept by a publisher
+DIMENSION_CACHE_SIZE = 64
+
+# Supported metric sinks: PutMetricData API calls, or Embedded Metric Format log lines
+METRICS_SINKS = ('api', 'emf')
+
+# Timeout for ECS task metadata endpoint requests (the endpoint is link-local)
+ECS_METADATA_TIMEOUT_SECONDS = 1
+
+
+def _read_metadata(*urls: str) -> List[Dict[str, Any]]:
+    """
+    Fetch and decode JSON documents from an ECS task metadata endpoint.
+    
+    All URLs must share one host; they are requested in order over a single
+    keep-alive HTTP connection.
+    
+    Args:
+        *urls: Metadata endpoint URLs
+        
+    Returns:
+        Decoded documents in the same order as urls
+    """
+    connection = http.client.HTTPConnection(urlsplit(urls[0]).netloc,
+                                            timeout=ECS_METADATA_TIMEOUT_SECONDS)
+    try:
+        documents = []
+        for url in urls:
+            parts = urlsplit(url)
+            path = (parts.path or '/') + (f"?{parts.query}" if parts.query else '')
+            connection.request('GET', path)
+            response = connection.getresponse()
+            body = response.read()
+            if response.status != 200:
+                raise OSError(f"HTTP {response.status} from {url}")
+            documents.append(json.loads(body))
+        return documents
+    finally:
+        connection.close()
+
 
-@dataclass
+@functools.lru_cache(maxsize=4)
+def _load_ecs_metadata(metadata_uri_v4: Optional[str],
+                       metadata_uri_v3: Optional[str]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Fetch ECS task and container metadata, cached per endpoint for the process.
+    
+    Uses the Task Metadata Endpoint V4 when available and falls back to the V3
+    container endpoint. Metadata does not change during a task's lifetime, so
+    every publisher in the process shares one fetch. Blocking; run it in an
+    executor.
+    
+    Returns:
+        Tuple of (task metadata, container metadata); empty dicts when unavailable
+    """
+    if metadata_uri_v4:
+        try:
+            task_metadata, container_metadata = _read_metadata(f"{metadata_uri_v4}/task", metadata_uri_v4)
+            return task_metadata, container_metadata
+        except Exception as e:
+            logger.debug("Failed to get ECS metadata: %s", e)
+    
+    # Try ECS Task Metadata Endpoint V3 (fallback for older ECS versions)
+    if metadata_uri_v3:
+        try:
+            container_metadata, = _read_metadata(metadata_uri_v3)
+            return {}, container_metadata
+        except Exception as e:
+            logger.debug("Failed to get ECS metadata v3: %s", e)
+    
+    return {}, {}
+
+
+@dataclass(slots=True)
 class MetricDatum:
     """Represents a single CloudWatch metric data point."""
     metric_name: str
     value: float
     unit: str = 'Count'
-    timestamp: Optional[datetime] = None
+    timestamp: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
     dimensions: Dict[str, str] = field(default_factory=dict)
-    
-    def __post_init__(self):
-        """Set default timestamp if not provided."""
-        if self.timestamp is None:
-            self.timestamp = datetime.now(timezone.utc)
 
 
-@dataclass
+@dataclass(slots=True)
 class ProducerMetricsSnapshot:
     """Snapshot of producer metrics at a point in time."""
     timestamp: datetime
@@ -49,6 +156,35 @@ class ProducerMetricsSnapshot:
     demo_phase: int
 
 
+def _retry_delay(base_delay: float, attempt: int, response: Optional[Dict[str, Any]] = None) -> float:
+    """
+    Compute a full-jitter exponential backoff delay for a retry attempt.
+    
+    Jitter keeps the publishers of many containers from retrying in lockstep
+    after a regional throttle. A Retry-After header on the error response, when
+    present, sets the minimum delay.
+    
+    Args:
+        base_delay: Delay ceiling for the first attempt, in seconds
+        attempt: Zero-based attempt number
+        response: Optional botocore error response carrying HTTP headers
+        
+    Returns:
+        Delay in seconds
+    """
+    delay = random.uniform(0, min(base_delay * (2 ** attempt), MAX_RETRY_DELAY_SECONDS))
+    
+    if response:
+        retry_after = response.get('ResponseMetadata', {}).get('HTTPHeaders', {}).get('retry-after')
+        if retry_after:
+            try:
+                delay = max(delay, min(float(retry_after), MAX_RETRY_DELAY_SECONDS))
+            except ValueError:
+                pass  # HTTP-date form is not used by CloudWatch
+    
+    return delay
+
+
 class CloudWatchMetricsPublisher:
     """
     Publishes producer metrics to CloudWatch with batching and error handling.
@@ -57,9 +193,10 @@ class CloudWatchMetricsPublisher:
     """
     
     def __init__(self, config: DemoConfig, namespace: str = None,
-                 publish_interval_seconds: int = 10, max_batch_size: int = 20,
+                 publish_interval_seconds: int = 10, max_batch_size: int = CLOUDWATCH_MAX_METRICS_PER_REQUEST,
                  service_name: str = None, 
-                 cluster_name: str = None):
+                 cluster_name: str = None, sink: str = None,
+                 use_async_client: Optional[bool] = None):
         self.config = config
         
         # Load container-specific configuration from environment variables
@@ -69,7 +206,76 @@ class CloudWatchMetricsPublisher:
         self.cluster_name = cluster_name or os.getenv('CLUSTER_NAME', 'kinesis-demo-cluster')
         self.environment = os.getenv('ENVIRONMENT', 'development')
         self.deployment_id = os.getenv('DEPLOYMENT_ID', 'default')
+        self.sink = (sink or os.getenv('CLOUDWATCH_METRICS_SINK', 'api')).lower()
+        if self.sink not in METRICS_SINKS:
+            raise ValueError(f"sink must be one of {METRICS_SINKS}, got '{self.sink}'")
+        
+        if not 1 <= max_batch_size <= CLOUDWATCH_MAX_METRICS_PER_REQUEST:
+            raise ValueError(f"max_batch_size must be between 1 and {CLOUDWATCH_MAX_METRICS_PER_REQUEST}")
+        
+        self.publish_interval_seconds = publish_interval_seconds
+        self.max_batch_size = max_batch_size
+        
+        # Initialize CloudWatch client
+        self.cloudwatch = boto3.client('cloudwatch', region_name=config.aws_region)
+        
+        # Optional native-async client, opened in start_publishing()
+        if use_async_client is None:
+            use_async_client = os.getenv('CLOUDWATCH_ASYNC', 'false').lower() == 'true'
+        if use_async_client and get_aio_session is None:
+            logger.warning("CLOUDWATCH_ASYNC is set but aiobotocore is not installed; using threads")
+            use_async_client = False
+        self.use_async_client = use_async_client
+        self._aio_cloudwatch = None
+        self._aio_exit_stack: Optional[AsyncExitStack] = None
+        
+        # ECS runtime metadata is discovered off the event loop in start_publishing();
+        # until then identity comes from environment variables and the hostname
+        self._task_metadata: Dict[str, Any] = {}
+        self._container_metadata: Dict[str, Any] = {}
+        self._metadata_discovered = False
+        self._configure_identity()
+        
+        # Metrics buffer and publishing state
+        # Only touched from the event loop thread and never across an await,
+        # so appends and the drain in flush_metrics need no lock
+        self.metrics_buffer: Deque[MetricDatum] = deque()
+        
+        # Dedicated pool for PutMetricData so publishing never queues behind
+        # other work on the loop's default executor; created on first use
+        self._publish_executor: Optional[ThreadPoolExecutor] = None
+        
+        # Serialized PutMetricData dimension lists keyed by dimension items;
+        # boto3 only reads them, so one list is shared by every datum in a set
+        self._dimension_cache: Dict[tuple, List[Dict[str, str]]] = {}
+        self.publishing_task: Optional[asyncio.Task] = None
+        self._pending_publish: Optional[asyncio.Task] = None
+        self.is_running = False
         
+        # Start of the current publish window, taken once per tick and used for
+        # custom metrics queued during the window (None until the first tick)
+        self._window_timestamp: Optional[datetime] = None
+        
+        # Windowed metrics tracking
+        self.last_publish_time = time.time()
+        self.idle_windows = 0
+        
+        # Callback for periodic metrics publishing (set by producer)
+        self.metrics_callback: Optional[callable] = None
+        
+        logger.info("CloudWatchMetricsPublisher initialized:")
+        logger.info("  - Container ID: %s", self.container_id)
+        logger.info("  - Service Name: %s", self.service_name)
+        logger.info("  - Cluster Name: %s", self.cluster_name)
+        logger.info("  - Environment: %s", self.environment)
+        logger.info("  - CloudWatch Namespace: %s", self.namespace)
+        logger.info("  - Metrics Sink: %s", self.sink)
+        logger.info("  - AWS Region: %s", config.aws_region)
+        logger.info("  - Publish Interval: %ss", self.publish_interval_seconds)
+        logger.info("  - Base Dimensions: %s", self.base_dimensions)
+    
+    def _configure_identity(self) -> None:
+        """Derive container identity and base dimensions from the known runtime metadata."""
         # Extract ECS runtime information if available
         self.ecs_cluster_name = self._get_ecs_cluster_name()
         self.ecs_service_name = self._get_ecs_service_name()
@@ -81,12 +287,6 @@ class CloudWatchMetricsPublisher:
         if self.ecs_service_name and self.service_name == 'kinesis-data-generator':
             self.service_name = self.ecs_service_name
         
-        self.publish_interval_seconds = publish_interval_seconds
-        self.max_batch_size = max_batch_size
-        
-        # Initialize CloudWatch client
-        self.cloudwatch = boto3.client('cloudwatch', region_name=config.aws_region)
-        
         # Container identification for multi-container deployments
         self.container_id = self._get_container_id()
         
@@ -103,31 +303,34 @@ class CloudWatchMetricsPublisher:
         if self.ecs_task_definition_family:
             self.base_dimensions['TaskDefinitionFamily'] = self.ecs_task_definition_family
         
-        # Metrics buffer and publishing state
-        self.metrics_buffer: List[MetricDatum] = []
-        self.buffer_lock = asyncio.Lock()
-        self.publishing_task: Optional[asyncio.Task] = None
-        self.is_running = False
+        # Per-phase dimension dicts, built once and shared by every snapshot of a phase
+        self._phase_dimensions: Dict[int, Dict[str, str]] = {}
+    
+    async def _discover_metadata(self) -> None:
+        """Fetch ECS runtime metadata without blocking the event loop and refresh identity."""
+        if self._metadata_discovered:
+            return
+        self._metadata_discovered = True
         
-        # Windowed metrics tracking
-        self.last_publish_time = time.time()
+        if not (os.getenv('ECS_CONTAINER_METADATA_URI_V4') or os.getenv('ECS_CONTAINER_METADATA_URI')):
+            return
         
-        # Callback for periodic metrics publishing (set by producer)
-        self.metrics_callback: Optional[callable] = None
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, self._fetch_ecs_metadata)
         
-        logger.info(f"CloudWatchMetricsPublisher initialized:")
-        logger.info(f"  - Container ID: {self.container_id}")
-        logger.info(f"  - Service Name: {self.service_name}")
-        logger.info(f"  - Cluster Name: {self.cluster_name}")
-        logger.info(f"  - Environment: {self.environment}")
-        logger.info(f"  - CloudWatch Namespace: {self.namespace}")
-        logger.info(f"  - AWS Region: {config.aws_region}")
-        logger.info(f"  - Publish Interval: {self.publish_interval_seconds}s")
-        logger.info(f"  - Base Dimensions: {self.base_dimensions}")
+        if self._task_metadata or self._container_metadata:
+            self._configure_identity()
+            logger.info("Discovered ECS metadata, base dimensions: %s", self.base_dimensions)
+    
+    def _fetch_ecs_metadata(self) -> None:
+        """Load ECS task and container metadata onto the instance. Blocking; run it in an executor."""
+        self._task_metadata, self._container_metadata = _load_ecs_metadata(
+            os.getenv('ECS_CONTAINER_METADATA_URI_V4'),
+            os.getenv('ECS_CONTAINER_METADATA_URI')
+        )
     
     def _get_container_id(self) -> str:
         """Get unique container identifier for multi-container deployments with ECS runtime support."""
-        import os
         import socket
         
         # Check for explicit container ID environment variable first
@@ -135,56 +338,18 @@ class CloudWatchMetricsPublisher:
         if container_id:
             return container_id[:16]  # Limit length for CloudWatch dimensions
         
-        # Try ECS Task Metadata Endpoint V4 (Fargate and EC2)
-        metadata_uri_v4 = os.getenv('ECS_CONTAINER_METADATA_URI_V4')
-        if metadata_uri_v4:
-            try:
-                import urllib.request
-                import json
-                
-                # Get task metadata
-                task_response = urllib.request.urlopen(f"{metadata_uri_v4}/task", timeout=2)
-                task_metadata = json.loads(task_response.read().decode())
-                
-                # Get container metadata
-                container_response = urllib.request.urlopen(metadata_uri_v4, timeout=2)
-                container_metadata = json.loads(container_response.read().decode())
-                
-                # Extract task ID and container name
-                task_arn = task_metadata.get('TaskARN', '')
-                task_id = task_arn.split('/')[-1][:8] if task_arn else ''
-                container_name = container_metadata.get('Name', '')
-                
-                if task_id and container_name:
-                    return f"{task_id}-{container_name}"[:16]
-                elif task_id:
-                    return f"ecs-{task_id}"[:16]
-                    
-            except Exception as e:
-                logger.debug(f"Failed to get ECS metadata: {e}")
+        # Use ECS task metadata (V4 task document, or the V3 container labels)
+        task_arn = (self._task_metadata.get('TaskARN')
+                    or self._container_metadata.get('Labels', {}).get('com.amazonaws.ecs.task-arn', ''))
+        task_id = task_arn.split('/')[-1][:8] if task_arn else ''
+        container_name = self._container_metadata.get('Name', '')
         
-        # Try ECS Task Metadata Endpoint V3 (fallback for older ECS versions)
-        metadata_uri_v3 = os.getenv('ECS_CONTAINER_METADATA_URI')
-        if metadata_uri_v3:
-            try:
-                import urllib.request
-                import json
-                
-                response = urllib.request.urlopen(metadata_uri_v3, timeout=2)
-                metadata = json.loads(response.read().decode())
-                
-                # Use container name and short task ARN
-                container_name = metadata.get('Name', '')
-                task_arn = metadata.get('Labels', {}).get('com.amazonaws.ecs.task-arn', '')
-                task_id = task_arn.split('/')[-1][:8] if task_arn else ''
-                
-                if task_id and container_name:
-                    return f"{task_id}-{container_name}"[:16]
-                elif container_name:
-                    return container_name[:16]
-                    
-            except Exception as e:
-                logger.debug(f"Failed to get ECS metadata v3: {e}")
+        if task_id and container_name:
+            return f"{task_id}-{container_name}"[:16]
+        elif task_id:
+            return f"ecs-{task_id}"[:16]
+        elif container_name:
+            return container_name[:16]
         
         # Try Kubernetes pod name
         k8s_pod = os.getenv('HOSTNAME')  # Kubernetes sets this to pod name
@@ -202,80 +367,29 @@ class CloudWatchMetricsPublisher:
     
     def _get_ecs_cluster_name(self) -> Optional[str]:
         """Extract ECS cluster name from runtime metadata."""
-        import os
-        
-        # Try ECS Task Metadata Endpoint V4
-        metadata_uri_v4 = os.getenv('ECS_CONTAINER_METADATA_URI_V4')
-        if metadata_uri_v4:
-            try:
-                import urllib.request
-                import json
-                
-                response = urllib.request.urlopen(f"{metadata_uri_v4}/task", timeout=2)
-                metadata = json.loads(response.read().decode())
-                
-                cluster_arn = metadata.get('ClusterArn', '')
-                if cluster_arn:
-                    # Extract cluster name from ARN: arn:aws:ecs:region:account:cluster/cluster-name
-                    return cluster_arn.split('/')[-1]
-                    
-            except Exception as e:
-                logger.debug(f"Failed to get ECS cluster name: {e}")
+        cluster_arn = self._task_metadata.get('ClusterArn', '')
+        if cluster_arn:
+            # Extract cluster name from ARN: arn:aws:ecs:region:account:cluster/cluster-name
+            return cluster_arn.split('/')[-1]
         
         return None
     
     def _get_ecs_service_name(self) -> Optional[str]:
         """Extract ECS service name from runtime metadata."""
-        import os
+        # ECS service name is in the ServiceName field
+        service_name = self._task_metadata.get('ServiceName')
+        if service_name:
+            return service_name
         
-        # Try ECS Task Metadata Endpoint V4
-        metadata_uri_v4 = os.getenv('ECS_CONTAINER_METADATA_URI_V4')
-        if metadata_uri_v4:
-            try:
-                import urllib.request
-                import json
-                
-                response = urllib.request.urlopen(f"{metadata_uri_v4}/task", timeout=2)
-                metadata = json.loads(response.read().decode())
-                
-                # ECS service name is in the ServiceName field
-                service_name = metadata.get('ServiceName')
-                if service_name:
-                    return service_name
-                    
-                # Fallback: try to extract from task definition ARN
-                task_def_arn = metadata.get('TaskDefinitionArn', '')
-                if task_def_arn:
-                    # Extract family name from task definition ARN
-                    family = task_def_arn.split('/')[-1].split(':')[0]
-                    return family
-                    
-            except Exception as e:
-                logger.debug(f"Failed to get ECS service name: {e}")
-        
-        return None
+        # Fallback: use the task definition family
+        return self._get_ecs_task_definition_family()
     
     def _get_ecs_task_definition_family(self) -> Optional[str]:
         """Extract ECS task definition family from runtime metadata."""
-        import os
-        
-        # Try ECS Task Metadata Endpoint V4
-        metadata_uri_v4 = os.getenv('ECS_CONTAINER_METADATA_URI_V4')
-        if metadata_uri_v4:
-            try:
-                import urllib.request
-                import json
-                
-                response = urllib.request.urlopen(f"{metadata_uri_v4}/task", timeout=2)
-                metadata = json.loads(response.read().decode())
-                
-                task_def_arn = metadata.get('TaskDefinitionArn', '')
-                if task_def_arn:
-                    # Extract family from ARN: arn:aws:ecs:region:account:task-definition/family:revision
-                    return task_def_arn.split('/')[-1].split(':')[0]
-                    
-            except Exception as e:
-                logger.debug(f"Failed to get ECS task definition family: {e}")
+        task_def_arn = self._task_metadata.get('TaskDefinitionArn', '')
+        if task_def_arn:
+            # Extract family from ARN: arn:aws:ecs:region:account:task-definition/family:revision
+            return task_def_arn.split('/')[-1].split(':')[0]
         
         return None
     
@@ -285,12 +399,22 @@ class CloudWatchMetricsPublisher:
             logger.warning("Metrics publishing is already running")
             return
         
-        # Test CloudWatch permissions before starting
-        await self._test_cloudwatch_permissions()
+        # Resolve ECS identity before the first metric goes out
+        await self._discover_metadata()
+        
+        if self.use_async_client and self.sink == 'api':
+            self._aio_exit_stack = AsyncExitStack()
+            self._aio_cloudwatch = await self._aio_exit_stack.enter_async_context(
+                get_aio_session().create_client('cloudwatch', region_name=self.config.aws_region)
+            )
+        
+        # Test CloudWatch permissions before starting (EMF output needs no API access)
+        if self.sink == 'api':
+            await self._test_cloudwatch_permissions()
         
         self.is_running = True
         self.publishing_task = asyncio.create_task(self._publishing_loop())
-        logger.info(f"Started metrics publishing every {self.publish_interval_seconds}s")
+        logger.info("Started metrics publishing every %ss", self.publish_interval_seconds)
     
     async def stop_publishing(self) -> None:
         """Stop the periodic metrics publishing task."""
@@ -303,8 +427,21 @@ class CloudWatchMetricsPublisher:
             except asyncio.CancelledError:
                 pass
         
-        # Flush any remaining metrics
+        # Let the last background publish finish, then flush any remaining metrics
+        try:
+            await self._wait_for_pending_publish()
+        except Exception as e:
+            logger.error("Background metrics publish failed: %s", e)
+            self._pending_publish = None
         await self.flush_metrics()
+        
+        if self._publish_executor is not None:
+            self._publish_executor.shutdown(wait=False)
+            self._publish_executor = None
+        if self._aio_exit_stack is not None:
+            await self._aio_exit_stack.aclose()
+            self._aio_exit_stack = None
+            self._aio_cloudwatch = None
         logger.info("Stopped metrics publishing")
     
     async def publish_producer_metrics(self, producer_metrics, demo_phase: int = 1) -> None:
@@ -320,15 +457,30 @@ class CloudWatchMetricsPublisher:
         # Create snapshot from current window metrics
         snapshot = self._create_metrics_snapshot(producer_metrics, demo_phase, current_time)
         
+        # Skip idle windows (e.g. between phases), keeping a periodic zero heartbeat
+        if self._is_idle_snapshot(snapshot):
+            self.idle_windows += 1
+            if (self.idle_windows - 1) % IDLE_HEARTBEAT_WINDOWS:
+                logger.debug("Skipping idle producer metrics window")
+                return
+        else:
+            self.idle_windows = 0
+        
         # Create CloudWatch metric data points
         metrics = await self._create_producer_metric_data(snapshot)
         
         # Add to buffer for batch publishing
-        async with self.buffer_lock:
-            self.metrics_buffer.extend(metrics)
-            buffer_size = len(self.metrics_buffer)
+        self.metrics_buffer.extend(metrics)
         
-        logger.debug(f"Queued {len(metrics)} producer metrics for publishing (buffer now has {buffer_size} metrics)")
+        logger.debug("Queued %d producer metrics for publishing (buffer now has %d metrics)", len(metrics), len(self.metrics_buffer))
+    
+    @staticmethod
+    def _is_idle_snapshot(snapshot: ProducerMetricsSnapshot) -> bool:
+        """Return True if the producer sent, batched, retried and was throttled on nothing."""
+        return (snapshot.messages_per_second == 0 and
+                snapshot.batch_count_per_second == 0 and
+                snapshot.throttle_exceptions_per_second == 0 and
+                snapshot.retry_count_per_second == 0)
     
     def _create_metrics_snapshot(self, producer_metrics, demo_phase: int, 
                                 timestamp: datetime) -> ProducerMetricsSnapshot:
@@ -369,10 +521,13 @@ class CloudWatchMetricsPublisher:
     async def _create_producer_metric_data(self, snapshot: ProducerMetricsSnapshot) -> List[MetricDatum]:
         """Create CloudWatch metric data points from producer metrics snapshot."""
         # Use base dimensions plus demo phase for consistent aggregation
-        dimensions = {
-            **self.base_dimensions,
-            'DemoPhase': str(snapshot.demo_phase)
-        }
+        dimensions = self._phase_dimensions.get(snapshot.demo_phase)
+        if dimensions is None:
+            dimensions = {
+                **self.base_dimensions,
+                'DemoPhase': str(snapshot.demo_phase)
+            }
+            self._phase_dimensions[snapshot.demo_phase] = dimensions
         
         metrics = [
             # Throughput metrics
@@ -449,34 +604,38 @@ class CloudWatchMetricsPublisher:
             value: Metric value
             unit: CloudWatch unit (Count, Seconds, Bytes, etc.)
             dimensions: Optional dimensions for the metric (will be merged with base dimensions)
+            
+        Custom metrics are stamped with the start of the current publish window
+        rather than the call time.
         """
-        # Merge with base dimensions for consistent aggregation
-        final_dimensions = {**self.base_dimensions}
+        # Merge with base dimensions for consistent aggregation; the shared base
+        # dict is never mutated, so it is used as-is when there is nothing to merge
         if dimensions:
-            final_dimensions.update(dimensions)
+            final_dimensions = {**self.base_dimensions, **dimensions}
+        else:
+            final_dimensions = self.base_dimensions
         
         metric = MetricDatum(
             metric_name=metric_name,
             value=value,
             unit=unit,
+            timestamp=self._window_timestamp or datetime.now(timezone.utc),
             dimensions=final_dimensions
         )
         
-        async with self.buffer_lock:
-            self.metrics_buffer.append(metric)
+        self.metrics_buffer.append(metric)
         
-        logger.debug(f"Queued custom metric {metric_name}={value} for publishing")
+        logger.debug("Queued custom metric %s=%s for publishing", metric_name, value)
     
     async def flush_metrics(self) -> None:
         """Flush all buffered metrics to CloudWatch immediately."""
-        async with self.buffer_lock:
-            if not self.metrics_buffer:
-                logger.debug("No metrics in buffer to flush")
-                return
-            
-            metrics_to_publish = self.metrics_buffer.copy()
-            self.metrics_buffer.clear()
-            logger.debug(f"Flushing {len(metrics_to_publish)} metrics from buffer to CloudWatch")
+        if not self.metrics_buffer:
+            logger.debug("No metrics in buffer to flush")
+            return
+        
+        # Swap in a fresh buffer instead of copying; serialization happens afterwards
+        metrics_to_publish, self.metrics_buffer = self.metrics_buffer, deque()
+        logger.debug("Flushing %d metrics from buffer to CloudWatch", len(metrics_to_publish))
         
         await self._publish_metrics_batch(metrics_to_publish)
     
@@ -485,39 +644,157 @@ class CloudWatchMetricsPublisher:
         self.metrics_callback = callback
     
     async def _publishing_loop(self) -> None:
-        """Main publishing loop that runs periodically."""
+        """
+        Main publishing loop that runs periodically.
+        
+        Each tick hands the drained buffer to a background publish task so the next
+        window starts on schedule while PutMetricData is in flight. At most one
+        publish is outstanding; a tick waits for the previous one before starting.
+        """
         while self.is_running:
             try:
                 await asyncio.sleep(self.publish_interval_seconds)
+                self._window_timestamp = datetime.now(timezone.utc)
                 
-                # If we have a metrics callback, use it for periodic publishing
+                # If we have a metrics callback, use it to queue the window's metrics
                 if self.metrics_callback:
                     await self.metrics_callback()
-                    # Flush the buffer after callback to actually publish metrics
-                    await self.flush_metrics()
-                else:
-                    # Otherwise just flush the buffer
-                    await self.flush_metrics()
+                
+                await self._wait_for_pending_publish()
+                self._pending_publish = self._start_background_flush()
                     
             except asyncio.CancelledError:
                 break
             except Exception as e:
-                logger.error(f"Error in metrics publishing loop: {e}")
+                logger.error("Error in metrics publishing loop: %s", e)
                 # Continue running despite errors
                 await asyncio.sleep(1)
     
-    async def _publish_metrics_batch(self, metrics: List[MetricDatum]) -> None:
+    def _start_background_flush(self) -> Optional[asyncio.Task]:
+        """Drain the buffer and publish it in a background task; None if the buffer is empty."""
+        if not self.metrics_buffer:
+            return None
+        
+        metrics_to_publish, self.metrics_buffer = self.metrics_buffer, deque()
+        logger.debug("Publishing %d metrics from buffer in the background", len(metrics_to_publish))
+        return asyncio.create_task(self._publish_metrics_batch(metrics_to_publish))
+    
+    async def _wait_for_pending_publish(self) -> None:
+        """Wait for the in-flight background publish, if any, to finish."""
+        if self._pending_publish is not None:
+            # Shielded so cancelling the loop does not abort a publish mid-request
+            await asyncio.shield(self._pending_publish)
+            self._pending_publish = None
+    
+    async def _publish_metrics_batch(self, metrics: Sequence[MetricDatum]) -> None:
         """Publish a batch of metrics to CloudWatch with error handling."""
         if not metrics:
             return
         
-        # Split into batches of max_batch_size (CloudWatch limit is 20)
-        for i in range(0, len(metrics), self.max_batch_size):
-            batch = metrics[i:i + self.max_batch_size]
+        if self.sink == 'emf':
+            self._write_emf_documents(metrics)
+            return
+        
+        # Split into batches of max_batch_size (CloudWatch limit is 1000 per request)
+        remaining = iter(metrics)
+        batch = list(islice(remaining, self.max_batch_size))
+        while batch:
             await self._publish_single_batch(batch)
+            batch = list(islice(remaining, self.max_batch_size))
+    
+    def _build_emf_documents(self, metrics: Sequence[MetricDatum]) -> List[Dict[str, Any]]:
+        """
+        Group metrics into Embedded Metric Format documents.
+        
+        Metrics that share a timestamp and dimension set (for example the seven
+        metrics of one producer snapshot) are coalesced into a single document.
+        A metric name that is already in the open document for its key starts
+        a new document, so repeated data points in one window are all kept.
+        
+        Args:
+            metrics: Buffered metric data points
+            
+        Returns:
+            List of EMF documents ready to be written as JSON log lines
+        """
+        documents: List[Dict[str, Any]] = []
+        open_documents: Dict[tuple, Dict[str, Any]] = {}
+        
+        for metric in metrics:
+            key = (metric.timestamp, tuple(metric.dimensions.items()))
+            document = open_documents.get(key)
+            if document is None or metric.metric_name in document:
+                document = {
+                    '_aws': {
+                        'Timestamp': int(metric.timestamp.timestamp() * 1000),
+                        'CloudWatchMetrics': [{
+                            'Namespace': self.namespace,
+                            'Dimensions': [list(metric.dimensions)],
+                            'Metrics': []
+                        }]
+                    },
+                    **metric.dimensions
+                }
+                open_documents[key] = document
+                documents.append(document)
+            
+            document['_aws']['CloudWatchMetrics'][0]['Metrics'].append(
+                {'Name': metric.metric_name, 'Unit': metric.unit}
+            )
+            document[metric.metric_name] = metric.value
+        
+        return documents
+    
+    def _write_emf_documents(self, metrics: Sequence[MetricDatum]) -> None:
+        """Write metrics to stdout as EMF log lines for CloudWatch Logs to extract."""
+        documents = self._build_emf_documents(metrics)
+        sys.stdout.write(''.join(
+            json.dumps(document, separators=(',', ':')) + '\n' for document in documents
+        ))
+        sys.stdout.flush()
+        logger.debug("Wrote %d metrics as %d EMF documents", len(metrics), len(documents))
+    
+    def _get_publish_executor(self) -> ThreadPoolExecutor:
+        """Return the publisher's dedicated PutMetricData thread pool, creating it if needed."""
+        if self._publish_executor is None:
+            self._publish_executor = ThreadPoolExecutor(
+                max_workers=PUBLISH_EXECUTOR_WORKERS,
+                thread_name_prefix='cw-publish'
+            )
+        return self._publish_executor
+    
+    async def _put_metric_data(self, metric_data: List[Dict[str, Any]]) -> None:
+        """Send one PutMetricData request on the async client if open, else on the thread pool."""
+        if self._aio_cloudwatch is not None:
+            await self._aio_cloudwatch.put_metric_data(
+                Namespace=self.namespace,
+                MetricData=metric_data
+            )
+            return
+        
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(
+            self._get_publish_executor(),
+            lambda: self.cloudwatch.put_metric_data(
+                Namespace=self.namespace,
+                MetricData=metric_data
+            )
+        )
+    
+    def _serialize_dimensions(self, dimensions: Dict[str, str]) -> List[Dict[str, str]]:
+        """Return the PutMetricData Dimensions list for a dimension set, reusing cached lists."""
+        key = tuple(dimensions.items())
+        serialized = self._dimension_cache.get(key)
+        if serialized is None:
+            # Dimension sets are few (base dimensions per demo phase plus custom metrics)
+            if len(self._dimension_cache) >= DIMENSION_CACHE_SIZE:
+                self._dimension_cache.clear()
+            serialized = [{'Name': name, 'Value': value} for name, value in key]
+            self._dimension_cache[key] = serialized
+        return serialized
     
     async def _publish_single_batch(self, batch: List[MetricDatum]) -> None:
-        """Publish a single batch of metrics with retry logic."""
+        """Publish a single batch of at most max_batch_size metrics with retry logic."""
         metric_data = []
         
         for metric in batch:
@@ -529,16 +806,14 @@ class CloudWatchMetricsPublisher:
             }
             
             if metric.dimensions:
-                data_point['Dimensions'] = [
-                    {'Name': name, 'Value': value}
-                    for name, value in metric.dimensions.items()
-                ]
+                data_point['Dimensions'] = self._serialize_dimensions(metric.dimensions)
             
             metric_data.append(data_point)
         
         # Log the metrics being published for debugging
-        logger.info(f"Publishing {len(batch)} metrics to CloudWatch namespace: {self.namespace}")
-        logger.debug(f"Metric names: {[m.metric_name for m in batch]}")
+        logger.info("Publishing %d metrics to CloudWatch namespace: %s", len(batch), self.namespace)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Metric names: %s", [m.metric_name for m in batch])
         
         # Retry logic for CloudWatch API calls
         max_retries = 3
@@ -546,46 +821,42 @@ class CloudWatchMetricsPublisher:
         
         for attempt in range(max_retries):
             try:
-                loop = asyncio.get_event_loop()
-                await loop.run_in_executor(
-                    None,
-                    lambda: self.cloudwatch.put_metric_data(
-                        Namespace=self.namespace,
-                        MetricData=metric_data
-                    )
-                )
+                await self._put_metric_data(metric_data)
                 
-                logger.info(f"Successfully published {len(batch)} metrics to CloudWatch namespace: {self.namespace}")
+                logger.info("Successfully published %d metrics to CloudWatch namespace: %s", len(batch), self.namespace)
                 return
                 
             except ClientError as e:
-                error_code = e.response['Error']['Code']
-                error_message = e.response['Error']['Message']
+                error = e.response.get('Error', {})
+                error_code = error.get('Code', '')
+                error_message = error.get('Message', '')
                 
-                if error_code == 'Throttling' and attempt < max_retries - 1:
-                    # Exponential backoff for throttling
-                    delay = base_delay * (2 ** attempt)
-                    logger.warning(f"CloudWatch throttled (attempt {attempt + 1}/{max_retries}), retrying in {delay}s: {error_message}")
+                if error_code in RETRYABLE_ERROR_CODES and attempt < max_retries - 1:
+                    # Jittered exponential backoff for throttling and transient service errors
+                    delay = _retry_delay(base_delay, attempt, e.response)
+                    logger.warning("CloudWatch returned %s (attempt %d/%d), retrying in %.2fs: %s", error_code, attempt + 1, max_retries, delay, error_message)
                     await asyncio.sleep(delay)
                     continue
-                elif error_code == 'AccessDenied':
-                    logger.error(f"CloudWatch access denied - check IAM permissions for namespace '{self.namespace}': {error_message}")
-                    logger.error(f"Required permission: cloudwatch:PutMetricData with namespace condition")
-                    break
+                elif error_code in ('AccessDenied', 'AccessDeniedException'):
+                    logger.error("CloudWatch access denied - check IAM permissions for namespace '%s': %s", self.namespace, error_message)
+                    logger.error("Required permission: cloudwatch:PutMetricData with namespace condition")
                 else:
-                    logger.error(f"CloudWatch API error (attempt {attempt + 1}/{max_retries}): {error_code} - {error_message}")
-                    if attempt == max_retries - 1:
-                        break
-                    
-            except (BotoCoreError, Exception) as e:
+                    logger.error("CloudWatch API error (attempt %d/%d): %s - %s", attempt + 1, max_retries, error_code, error_message)
+                break
+                
+            except RETRYABLE_EXCEPTIONS as e:
                 if attempt < max_retries - 1:
-                    delay = base_delay * (2 ** attempt)
-                    logger.warning(f"CloudWatch error (attempt {attempt + 1}/{max_retries}), retrying in {delay}s: {e}")
+                    delay = _retry_delay(base_delay, attempt)
+                    logger.warning("CloudWatch connection error (attempt %d/%d), retrying in %.2fs: %s", attempt + 1, max_retries, delay, e)
                     await asyncio.sleep(delay)
                     continue
-                else:
-                    logger.error(f"Failed to publish metrics after {max_retries} attempts: {e}")
-                    break
+                logger.error("Failed to publish metrics after %d attempts: %s", max_retries, e)
+                break
+                
+            except Exception as e:
+                # Validation, credential and other non-transient errors will not succeed on retry
+                logger.error("Failed to publish metrics to CloudWatch: %s", e)
+                break
     
     async def __aenter__(self):
         """Async context manager entry."""
@@ -602,12 +873,12 @@ class CloudWatchMetricsPublisher:
                 dimensions=self.base_dimensions
             )
             
-            logger.info(f"Testing CloudWatch permissions for namespace: {self.namespace}")
+            logger.info("Testing CloudWatch permissions for namespace: %s", self.namespace)
             await self._publish_single_batch([test_metric])
             logger.info("CloudWatch permissions test successful")
             
         except Exception as e:
-            logger.error(f"CloudWatch permissions test failed: {e}")
+            logger.error("CloudWatch permissions test failed: %s", e)
             logger.error("This may indicate IAM permission issues or incorrect namespace configuration")
             # Don't raise the exception - let the application continue but log the issue
     
@@ -3,16 +3,17 @@ Configuration management for demo parameters.
 """
 
 import os
-from dataclasses import dataclass
-from typing import List
+from dataclasses import dataclass, field
+from typing import Tuple
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class DemoConfig:
     """Configuration parameters for the Kinesis On-Demand Demo."""
     
-    # Phase durations in seconds (kept for backward compatibility)
-    phase_durations: List[int] = None
+    # Phase durations in seconds (kept for backward compatibility), 2 minutes each by default;
+    # any sequence is accepted and stored as a tuple so the frozen config stays immutable
+    phase_durations: Tuple[int, ...] = (120, 120, 120, 120)
     
     # Kinesis configuration
     stream_name: str = "social-media-stream"
@@ -28,10 +29,12 @@ class DemoConfig:
     ecs_vcpu_hour_cost: float = 0.04048
     ecs_gb_hour_cost: float = 0.004445
     
+    # Sum of phase_durations, computed once since the configuration is frozen
+    _total_demo_duration: int = field(init=False, repr=False, compare=False)
+    
     def __post_init__(self):
-        """Initialize default values and validate configuration."""
-        if self.phase_durations is None:
-            self.phase_durations = [120, 120, 120, 120]  # 2 minutes each phase
+        """Validate configuration and precompute derived values."""
+        object.__setattr__(self, 'phase_durations', tuple(self.phase_durations))
         
         # Validate phase durations
         if len(self.phase_durations) != 4:
@@ -39,6 +42,8 @@ class DemoConfig:
         
         if any(duration <= 0 for duration in self.phase_durations):
             raise ValueError("All phase durations must be positive")
+        
+        object.__setattr__(self, '_total_demo_duration', sum(self.phase_durations))
     
     @classmethod
     def from_environment(cls) -> 'DemoConfig':
@@ -58,4 +63,4 @@ class DemoConfig:
     
     def get_total_demo_duration(self) -> int:
         """Get total demo duration in seconds."""
-        return sum(self.phase_durations)
\ No newline at end of file
+        return self._total_demo_duration
\ No newline at end of file
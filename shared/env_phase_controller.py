@@ -13,6 +13,13 @@ from typing import Dict, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Demo progress by phase number (each phase is 25% of the demo); index 0 is unused
+_PROGRESS_BY_PHASE = (0.0, 0.25, 0.50, 0.75, 1.0)
+
+# Post type distributions (original, share, reply)
+_EARLY_POST_DISTRIBUTION = (0.7, 0.2, 0.1)  # Early phases: mostly original content
+_VIRAL_POST_DISTRIBUTION = (0.4, 0.4, 0.2)  # Viral phases: more shares and replies
+
 
 class EnvironmentPhaseController:
     """
@@ -24,29 +31,45 @@ class EnvironmentPhaseController:
     
     def __init__(self):
         """Initialize the environment phase controller."""
-        # Log initial values but don't cache them
-        initial_phase = int(os.getenv('DEMO_PHASE', '1'))
-        initial_tps = int(os.getenv('TARGET_TPS', '100'))
+        # ECS task environment is fixed for the task's lifetime (Step Functions rolls
+        # out new tasks to change phase), so values are read once; see refresh()
+        self.refresh()
         
-        logger.info(f"EnvironmentPhaseController initialized - Initial Phase: {initial_phase}, Initial Target TPS: {initial_tps}")
-        logger.info("Phase and TPS will be read dynamically from environment variables")
+        logger.info(f"EnvironmentPhaseController initialized - Phase: {self._phase}, Target TPS: {self._target_tps}")
+    
+    def refresh(self) -> None:
+        """Re-read phase, target TPS and per-task capacity from environment variables."""
+        self._phase = int(os.getenv('DEMO_PHASE', '1'))
+        self._target_tps = int(os.getenv('TARGET_TPS', '100'))
+        self._per_task_capacity = int(os.getenv('PER_TASK_CAPACITY', '1000'))
+        
+        # Enforce per-task capacity limit
+        # TARGET_TPS should already be limited by Step Functions, but double-check
+        self._effective_tps = min(self._target_tps, self._per_task_capacity)
+        
+        self._demo_progress = _PROGRESS_BY_PHASE[self._phase] if 1 <= self._phase <= 4 else 0.0
+        self._post_type_distribution = (
+            _EARLY_POST_DISTRIBUTION if self._phase <= 2 else _VIRAL_POST_DISTRIBUTION
+        )
+        
+        self._phase_info = {
+            'phase_number': self._phase,
+            'target_tps': self._target_tps,
+            'duration_seconds': 120,  # Fixed duration for all phases
+            'source': 'environment_variables'
+        }
     
     def get_current_phase_number(self) -> int:
         """Get the current demo phase number from environment variables."""
-        return int(os.getenv('DEMO_PHASE', '1'))
+        return self._phase
     
     def get_target_tps(self) -> int:
         """Get the target TPS for the current phase from environment variables."""
-        return int(os.getenv('TARGET_TPS', '100'))
+        return self._target_tps
     
     def get_current_phase_info(self) -> Dict:
         """Get complete current phase information from environment variables."""
-        return {
-            'phase_number': self.get_current_phase_number(),
-            'target_tps': self.get_target_tps(),
-            'duration_seconds': 120,  # Fixed duration for all phases
-            'source': 'environment_variables'
-        }
+        return self._phase_info
     
     def is_demo_running(self) -> bool:
         """Check if the demo is currently running (always true for deployed containers)."""
@@ -54,31 +77,15 @@ class EnvironmentPhaseController:
     
     def get_demo_progress(self) -> float:
         """Get demo progress (estimated based on current phase)."""
-        progress_map = {1: 0.25, 2: 0.50, 3: 0.75, 4: 1.0}
-        current_phase = self.get_current_phase_number()
-        return progress_map.get(current_phase, 0.0)
+        return self._demo_progress
     
     def calculate_messages_to_generate(self, time_window_seconds: float = 1.0) -> int:
         """Calculate number of messages to generate in the given time window."""
-        # Get current values from environment variables
-        target_tps = self.get_target_tps()
-        per_task_capacity = int(os.getenv('PER_TASK_CAPACITY', '1000'))
-        
-        # Enforce per-task capacity limit
-        # TARGET_TPS should already be limited by Step Functions, but double-check
-        effective_tps = min(target_tps, per_task_capacity)
-        
-        return int(effective_tps * time_window_seconds)
+        return int(self._effective_tps * time_window_seconds)
     
     def get_post_type_distribution(self) -> Tuple[float, float, float]:
         """Get distribution of post types for current phase (original, share, reply)."""
-        current_phase = self.get_current_phase_number()
-        if current_phase <= 2:
-            # Early phases: mostly original content
-            return (0.7, 0.2, 0.1)
-        else:
-            # Viral phases: more shares and replies
-            return (0.4, 0.4, 0.2)
+        return self._post_type_distribution
 
 
 # Compatibility interface to match the original TrafficPatternController
@@ -146,4 +153,8 @@ class EnvironmentTrafficPatternController:
     
     def get_post_type_distribution(self) -> Tuple[float, float, float]:
         """Get post type distribution from environment variables."""
-        return self.env_controller.get_post_type_distribution()
\ No newline at end of file
+        return self.env_controller.get_post_type_distribution()
+    
+    def refresh(self) -> None:
+        """Re-read phase settings from environment variables."""
+        self.env_controller.refresh()
\ No newline at end of file
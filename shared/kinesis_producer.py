@@ -71,6 +71,9 @@ class BatchRequest:
     """Represents a batch of records to be sent to Kinesis."""
     records: List[Dict] = field(default_factory=list)
     created_at: datetime = field(default_factory=datetime.utcnow)
+    # Running payload size of records added through add_record, so the
+    # request size limit can be checked per record without re-walking the batch
+    size_bytes: int = 0
     
     def add_record(self, record: KinesisRecord) -> None:
         """Add a record to the batch."""
@@ -78,12 +81,15 @@ class BatchRequest:
             'Data': record.data,
             'PartitionKey': record.partition_key
         }
+        size = len(record.data) + len(record.partition_key.encode('utf-8'))
         
         # Only include ExplicitHashKey if it's not None
         if record.explicit_hash_key is not None:
             record_dict['ExplicitHashKey'] = record.explicit_hash_key
+            size += len(record.explicit_hash_key.encode('utf-8'))
             
         self.records.append(record_dict)
+        self.size_bytes += size
     
     def size(self) -> int:
         """Get the number of records in the batch."""
@@ -231,26 +237,37 @@ class KinesisProducer:
         
         logger.info(f"KinesisProducer initialized for stream: {config.stream_name}")
     
+    def _build_record(self, post: SocialMediaPost) -> KinesisRecord:
+        """Serialize a post and wrap it in a Kinesis record with its partition key."""
+        # Serialize post to bytes
+        data_bytes = post_to_bytes(post)
+        
+        # Create Kinesis record with optimized partition key
+        partition_key = self.partition_distributor.get_partition_key(post)
+        record = KinesisRecord(
+            partition_key=partition_key,
+            data=data_bytes
+        )
+        
+        # Track message size for metrics
+        if self.enable_metrics:
+            message_size = len(data_bytes) + len(partition_key.encode('utf-8'))
+            self.metrics.message_size += message_size
+        
+        return record
+    
+    def _is_batch_ready(self) -> bool:
+        """Check whether the current batch has hit the record count or size limit."""
+        return (self.current_batch.is_full(self.max_batch_size) or
+                self.current_batch.size_bytes > 4 * 1024 * 1024)  # 4MB limit - let is_full() handle max_batch_size
+    
     async def send_post(self, post: SocialMediaPost) -> bool:
         """
         Send a single social media post to Kinesis.
         Returns True if successful, False otherwise.
         """
         try:
-            # Serialize post to bytes
-            data_bytes = post_to_bytes(post)
-            
-            # Create Kinesis record with optimized partition key
-            partition_key = self.partition_distributor.get_partition_key(post)
-            record = KinesisRecord(
-                partition_key=partition_key,
-                data=data_bytes
-            )
-            
-            # Track message size for metrics
-            if self.enable_metrics:
-                message_size = len(data_bytes) + len(partition_key.encode('utf-8'))
-                self.metrics.message_size += message_size
+            record = self._build_record(post)
             
             # Add to batch
             await self._add_to_batch(record)
@@ -265,60 +282,82 @@ class KinesisProducer:
     async def send_posts_batch(self, posts: List[SocialMediaPost]) -> Tuple[int, int]:
         """
         Send multiple posts in optimized batches.
+        
+        Each post is serialized, keyed and added to the current batch in a
+        single pass under the batch lock; full batches are only swapped out
+        there and are sent to Kinesis after the lock is released, so other
+        callers can keep filling the next batch while these are in flight.
         Returns tuple of (successful_count, failed_count).
         """
         successful = 0
         failed = 0
+        ready_batches: List[BatchRequest] = []
         
-        for post in posts:
-            if await self.send_post(post):
+        async with self.batch_lock:
+            for post in posts:
+                try:
+                    record = self._build_record(post)
+                except Exception as e:
+                    logger.error(f"Failed to send post {post.id}: {e}")
+                    if self.enable_metrics:
+                        self.metrics.messages_failed += 1
+                    failed += 1
+                    continue
+                
+                self.current_batch.add_record(record)
                 successful += 1
-            else:
-                failed += 1
+                if self._is_batch_ready():
+                    ready_batches.append(self._take_current_batch())
+            
+            # Take any remaining records as well (same as flush())
+            if self.current_batch.size() > 0:
+                ready_batches.append(self._take_current_batch())
         
-        # Flush any remaining records
-        await self.flush()
+        for batch in ready_batches:
+            await self._send_batch(batch)
         
         return successful, failed
     
     async def _add_to_batch(self, record: KinesisRecord) -> None:
         """Add record to current batch and send if batch is full."""
+        batch_to_send = None
         async with self.batch_lock:
             self.current_batch.add_record(record)
             
             # Send batch when we have enough records or hit size/timeout limits
-            if (self.current_batch.is_full(self.max_batch_size) or 
-                self.current_batch.get_total_size_bytes() > 4 * 1024 * 1024):  # 4MB limit - let is_full() handle max_batch_size
-                await self._send_current_batch()
+            if self._is_batch_ready():
+                batch_to_send = self._take_current_batch()
             else:
                 # Start timer for batch timeout if not already running
                 if self.batch_timer_task is None or self.batch_timer_task.done():
                     self.batch_timer_task = asyncio.create_task(self._batch_timeout())
+        
+        if batch_to_send is not None:
+            await self._send_batch(batch_to_send)
     
     async def _batch_timeout(self) -> None:
         """Handle batch timeout to ensure timely delivery."""
         await asyncio.sleep(self.max_batch_wait_ms / 1000.0)
-        
-        async with self.batch_lock:
-            if self.current_batch.size() > 0:
-                await self._send_current_batch()
+        await self.flush()
     
-    async def _send_current_batch(self) -> None:
-        """Send the current batch to Kinesis with retry logic."""
-        if self.current_batch.size() == 0:
+    def _take_current_batch(self) -> BatchRequest:
+        """Swap out the current batch and start a new one. Call with batch_lock held."""
+        batch = self.current_batch
+        self.current_batch = BatchRequest()
+        return batch
+    
+    async def _send_batch(self, batch_to_send: BatchRequest) -> None:
+        """Send a batch taken from the current batch to Kinesis with retry logic."""
+        if batch_to_send.size() == 0:
             return
         
         # Check circuit breaker
         if self._is_circuit_breaker_open():
             logger.warning("Circuit breaker is open, dropping batch")
             if self.enable_metrics:
-                self.metrics.messages_failed += self.current_batch.size()
-            self.current_batch = BatchRequest()
+                self.metrics.messages_failed += batch_to_send.size()
             return
         
-        batch_to_send = self.current_batch
-        self.current_batch = BatchRequest()
-        
         start_time = time.time()
         
         try:
@@ -348,9 +387,13 @@ class KinesisProducer:
     
     async def _send_batch_with_retry(self, batch: BatchRequest) -> None:
         """Send batch with exponential backoff retry logic."""
-        self.backoff.reset()
+        # Batches are sent concurrently, so each send gets its own retry state
+        backoff = ExponentialBackoff(base_delay=self.backoff.base_delay,
+                                     max_delay=self.backoff.max_delay,
+                                     max_retries=self.backoff.max_retries,
+                                     jitter=self.backoff.jitter)
         
-        while self.backoff.should_retry():
+        while backoff.should_retry():
             try:
                 response = await self._put_records(batch.records)
                 
@@ -374,8 +417,8 @@ class KinesisProducer:
                         self.metrics.throttle_exceptions += 1
                         self.metrics.retry_count += 1
                     
-                    logger.warning(f"Throttled, retrying in {self.backoff.get_delay():.2f}s")
-                    await self.backoff.wait()
+                    logger.warning(f"Throttled, retrying in {backoff.get_delay():.2f}s")
+                    await backoff.wait()
                     continue
                 
                 elif error_code in ['InternalFailure', 'ServiceUnavailable']:
@@ -384,7 +427,7 @@ class KinesisProducer:
                         self.metrics.retry_count += 1
                     
                     logger.warning(f"Service error {error_code}, retrying")
-                    await self.backoff.wait()
+                    await backoff.wait()
                     continue
                 
                 else:
@@ -398,11 +441,11 @@ class KinesisProducer:
                     self.metrics.retry_count += 1
                 
                 logger.warning(f"Network/service error, retrying: {e}")
-                await self.backoff.wait()
+                await backoff.wait()
                 continue
         
         # Exhausted retries
-        raise Exception(f"Failed to send batch after {self.backoff.max_retries} retries")
+        raise Exception(f"Failed to send batch after {backoff.max_retries} retries")
     
     async def _put_records(self, records: List[Dict]) -> Dict:
         """Send records to Kinesis using put_records API."""
@@ -461,8 +504,11 @@ class KinesisProducer:
     async def flush(self) -> None:
         """Flush any pending records in the current batch."""
         async with self.batch_lock:
-            if self.current_batch.size() > 0:
-                await self._send_current_batch()
+            if self.current_batch.size() == 0:
+                return
+            batch_to_send = self._take_current_batch()
+        
+        await self._send_batch(batch_to_send)
     
     def get_metrics(self) -> ProducerMetrics:
         """Get current producer metrics."""
@@ -4,13 +4,32 @@ JSON serialization/deserialization utilities for demo data models.
 
 import json
 from datetime import datetime
-from typing import Any, Dict, Type, TypeVar
-from dataclasses import asdict, is_dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, Tuple, Type, TypeVar
+from dataclasses import fields, is_dataclass
 
 from .models import SocialMediaPost, KinesisRecord, DemoMetrics, GeoLocation, PostType
 
+# orjson encodes dataclasses, enums and datetimes natively; fall back to the
+# standard library encoder when it is not installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 T = TypeVar('T')
 
+# Field names per dataclass type, so the encoder does not call fields() per object
+_FIELD_NAMES: Dict[type, Tuple[str, ...]] = {}
+
+
+def _field_names(cls: type) -> Tuple[str, ...]:
+    """Return the cached field names of a dataclass type."""
+    names = _FIELD_NAMES.get(cls)
+    if names is None:
+        names = _FIELD_NAMES[cls] = tuple(f.name for f in fields(cls))
+    return names
+
 
 class DemoJSONEncoder(json.JSONEncoder):
     """Custom JSON encoder for demo data types."""
@@ -22,20 +41,33 @@ class DemoJSONEncoder(json.JSONEncoder):
         elif isinstance(obj, PostType):
             return obj.value
         elif is_dataclass(obj):
-            return asdict(obj)
+            # Shallow dict; the encoder recurses into nested values itself,
+            # so the deep copy made by asdict() is not needed
+            return {name: getattr(obj, name) for name in _field_names(type(obj))}
         return super().default(obj)
 
 
+# Stdlib fallback encoder, built once; compact separators match orjson output
+_ENCODER = DemoJSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+
 def serialize_to_json(obj: Any) -> str:
     """Serialize an object to JSON string."""
+    if orjson is not None:
+        return serialize_to_bytes(obj).decode('utf-8')
     try:
-        return json.dumps(obj, cls=DemoJSONEncoder, ensure_ascii=False)
+        return _ENCODER.encode(obj)
     except (TypeError, ValueError) as e:
         raise ValueError(f"Failed to serialize object to JSON: {e}")
 
 
 def serialize_to_bytes(obj: Any) -> bytes:
     """Serialize an object to JSON bytes."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj)
+        except TypeError as e:
+            raise ValueError(f"Failed to serialize object to JSON: {e}")
     json_str = serialize_to_json(obj)
     return json_str.encode('utf-8')
 
@@ -43,7 +75,7 @@ def serialize_to_bytes(obj: Any) -> bytes:
 def deserialize_from_json(json_str: str, target_class: Type[T]) -> T:
     """Deserialize JSON string to target class instance."""
     try:
-        data = json.loads(json_str)
+        data = orjson.loads(json_str) if orjson is not None else json.loads(json_str)
         return _dict_to_dataclass(data, target_class)
     except (json.JSONDecodeError, TypeError, ValueError) as e:
         raise ValueError(f"Failed to deserialize JSON to {target_class.__name__}: {e}")
@@ -51,6 +83,9 @@ def deserialize_from_json(json_str: str, target_class: Type[T]) -> T:
 
 def deserialize_from_bytes(json_bytes: bytes, target_class: Type[T]) -> T:
     """Deserialize JSON bytes to target class instance."""
+    if orjson is not None:
+        # orjson parses UTF-8 bytes directly and rejects invalid UTF-8 itself
+        return deserialize_from_json(json_bytes, target_class)
     try:
         json_str = json_bytes.decode('utf-8')
         return deserialize_from_json(json_str, target_class)
@@ -58,29 +93,53 @@ def deserialize_from_bytes(json_bytes: bytes, target_class: Type[T]) -> T:
         raise ValueError(f"Failed to decode bytes to UTF-8: {e}")
 
 
+# Fields whose JSON form needs converting back: name -> (JSON type, expression)
+_FIELD_CONVERSIONS: Dict[str, Tuple[type, str]] = {
+    # ISO format string back to datetime
+    'timestamp': (str, 'datetime.fromisoformat(value)'),
+    # String back to PostType enum
+    'post_type': (str, 'PostType(value)'),
+    # Dict back to GeoLocation (an empty dict is left as is)
+    'location': (dict, 'GeoLocation(**value) if value else value'),
+}
+
+
+@lru_cache(maxsize=None)
+def _builder_for(target_class: type) -> Callable[[Dict[str, Any]], Any]:
+    """
+    Generate a dict-to-instance builder specialized to one dataclass type.
+    
+    Like the __init__ that dataclasses generates, the source is built once per
+    class and only contains the conversions for fields the class has, so
+    decoding a record does no per-key name matching.
+    """
+    lines = ['def build(data):', '    converted = dict(data)']
+    for name in _field_names(target_class):
+        if name not in _FIELD_CONVERSIONS:
+            continue
+        json_type, expression = _FIELD_CONVERSIONS[name]
+        lines.append(f'    value = converted.get({name!r})')
+        lines.append(f'    if isinstance(value, {json_type.__name__}):')
+        lines.append(f'        converted[{name!r}] = {expression}')
+    lines.append('    return target_class(**converted)')
+    
+    namespace = {
+        'datetime': datetime,
+        'PostType': PostType,
+        'GeoLocation': GeoLocation,
+        'target_class': target_class,
+    }
+    exec('\n'.join(lines), namespace)
+    return namespace['build']
+
+
 def _dict_to_dataclass(data: Dict[str, Any], target_class: Type[T]) -> T:
     """Convert dictionary to dataclass instance with type conversion."""
     if not is_dataclass(target_class):
         raise ValueError(f"{target_class.__name__} is not a dataclass")
     
-    # Handle special type conversions
-    converted_data = {}
-    
-    for field_name, field_value in data.items():
-        if field_name == 'timestamp' and isinstance(field_value, str):
-            # Convert ISO format string back to datetime
-            converted_data[field_name] = datetime.fromisoformat(field_value)
-        elif field_name == 'post_type' and isinstance(field_value, str):
-            # Convert string back to PostType enum
-            converted_data[field_name] = PostType(field_value)
-        elif field_name == 'location' and isinstance(field_value, dict) and field_value:
-            # Convert dict back to GeoLocation
-            converted_data[field_name] = GeoLocation(**field_value)
-        else:
-            converted_data[field_name] = field_value
-    
     try:
-        return target_class(**converted_data)
+        return _builder_for(target_class)(data)
     except TypeError as e:
         raise ValueError(f"Failed to create {target_class.__name__} instance: {e}")
 
@@ -106,6 +165,11 @@ def post_from_bytes(json_bytes: bytes) -> SocialMediaPost:
     return deserialize_from_bytes(json_bytes, SocialMediaPost)
 
 
+def post_from_dict(data: Dict[str, Any]) -> SocialMediaPost:
+    """Convert an already-decoded JSON dictionary to SocialMediaPost."""
+    return _dict_to_dataclass(data, SocialMediaPost)
+
+
 def metrics_to_json(metrics: DemoMetrics) -> str:
     """Serialize DemoMetrics to JSON string."""
     return serialize_to_json(metrics)
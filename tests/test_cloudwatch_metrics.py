@@ -13,7 +13,9 @@ import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from shared.cloudwatch_metrics import (
-    CloudWatchMetricsPublisher, MetricDatum, ProducerMetricsSnapshot
+    CloudWatchMetricsPublisher, MetricDatum, ProducerMetricsSnapshot,
+    CLOUDWATCH_MAX_METRICS_PER_REQUEST, IDLE_HEARTBEAT_WINDOWS,
+    MAX_RETRY_DELAY_SECONDS, _retry_delay
 )
 from shared.kinesis_producer import ProducerMetrics
 from shared.config import DemoConfig
@@ -31,6 +33,19 @@ def demo_config():
     )
 
 
+@pytest.fixture
+def base_config():
+    """Create a demo configuration from the current DemoConfig fields."""
+    return DemoConfig(stream_name="test-stream", aws_region="us-east-1")
+
+
+@pytest.fixture
+def publisher(base_config):
+    """Create a publisher with a mocked CloudWatch client."""
+    with patch('boto3.client'):
+        return CloudWatchMetricsPublisher(base_config)
+
+
 @pytest.fixture
 def producer_metrics():
     """Create test producer metrics."""
@@ -132,7 +147,7 @@ class TestCloudWatchMetricsPublisher:
         assert publisher.config == demo_config
         assert publisher.namespace == "KinesisOnDemandDemo"
         assert publisher.publish_interval_seconds == 10
-        assert publisher.max_batch_size == 20
+        assert publisher.max_batch_size == 1000
         assert publisher.cloudwatch == mock_client
         assert publisher.container_id is not None
         assert len(publisher.container_id) <= 16
@@ -422,5 +437,203 @@ class TestCloudWatchMetricsPublisher:
         assert messages_metric.dimensions['DemoPhase'] == '2'
 
 
+
+class TestPutMetricDataBatchLimit:
+    """Test the PutMetricData request size limit."""
+    
+    @pytest.mark.parametrize("max_batch_size", [0, CLOUDWATCH_MAX_METRICS_PER_REQUEST + 1])
+    def test_max_batch_size_out_of_range(self, base_config, max_batch_size):
+        """Test that batch sizes outside the CloudWatch limit are rejected."""
+        with patch('boto3.client'):
+            with pytest.raises(ValueError, match="max_batch_size"):
+                CloudWatchMetricsPublisher(base_config, max_batch_size=max_batch_size)
+    
+    def test_default_max_batch_size(self, publisher):
+        """Test that the publisher defaults to the CloudWatch per-request limit."""
+        assert publisher.max_batch_size == CLOUDWATCH_MAX_METRICS_PER_REQUEST == 1000
+    
+    @pytest.mark.asyncio
+    async def test_flush_splits_into_full_requests(self, publisher):
+        """Test that 2500 buffered metrics are sent as 1000, 1000 and 500."""
+        for i in range(2500):
+            await publisher.publish_custom_metric("TestMetric", float(i))
+        
+        with patch.object(publisher, '_publish_single_batch', new_callable=AsyncMock) as mock_publish:
+            await publisher.flush_metrics()
+        
+        assert [len(call.args[0]) for call in mock_publish.call_args_list] == [1000, 1000, 500]
+
+
+class TestEmfDocuments:
+    """Test grouping of metrics into Embedded Metric Format documents."""
+    
+    TIMESTAMP = datetime(2024, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+    
+    def _metric(self, name, value, dimensions=None, timestamp=None):
+        return MetricDatum(
+            metric_name=name,
+            value=value,
+            unit="Count",
+            timestamp=timestamp or self.TIMESTAMP,
+            dimensions=dimensions if dimensions is not None else {"DemoPhase": "1"}
+        )
+    
+    def test_document_shape(self, publisher):
+        """Test that a document carries the EMF metadata, dimensions and values."""
+        documents = publisher._build_emf_documents([self._metric("Sent", 5.0)])
+        
+        assert documents == [{
+            '_aws': {
+                'Timestamp': int(self.TIMESTAMP.timestamp() * 1000),
+                'CloudWatchMetrics': [{
+                    'Namespace': publisher.namespace,
+                    'Dimensions': [["DemoPhase"]],
+                    'Metrics': [{'Name': "Sent", 'Unit': "Count"}]
+                }]
+            },
+            'DemoPhase': "1",
+            'Sent': 5.0
+        }]
+    
+    def test_coalesces_shared_timestamp_and_dimensions(self, publisher):
+        """Test that metrics with the same timestamp and dimensions share a document."""
+        documents = publisher._build_emf_documents([
+            self._metric("Sent", 5.0),
+            self._metric("Failed", 1.0),
+            self._metric("Sent", 2.0, dimensions={"DemoPhase": "2"}),
+        ])
+        
+        assert len(documents) == 2
+        names = [m['Name'] for m in documents[0]['_aws']['CloudWatchMetrics'][0]['Metrics']]
+        assert names == ["Sent", "Failed"]
+        assert documents[1]['DemoPhase'] == "2"
+        assert documents[1]['Sent'] == 2.0
+    
+    def test_repeated_metric_name_starts_new_document(self, publisher):
+        """Test that a repeated metric in one window keeps every data point."""
+        documents = publisher._build_emf_documents([
+            self._metric("Sent", 5.0),
+            self._metric("Failed", 1.0),
+            self._metric("Sent", 7.0),
+        ])
+        
+        assert [doc['Sent'] for doc in documents] == [5.0, 7.0]
+        for document in documents:
+            names = [m['Name'] for m in document['_aws']['CloudWatchMetrics'][0]['Metrics']]
+            assert len(names) == len(set(names))
+
+
+
+class TestRetryDelay:
+    """Test the jittered backoff delay for PutMetricData retries."""
+    
+    def test_jitter_bounded_by_exponential_ceiling(self):
+        """Test that every delay falls between zero and base * 2**attempt."""
+        for attempt in range(4):
+            for _ in range(200):
+                delay = _retry_delay(1.0, attempt)
+                assert 0 <= delay <= 1.0 * (2 ** attempt)
+    
+    def test_jitter_capped_at_max_delay(self):
+        """Test that late attempts never exceed the maximum delay."""
+        for _ in range(200):
+            assert _retry_delay(1.0, 20) <= MAX_RETRY_DELAY_SECONDS
+    
+    def test_retry_after_sets_minimum_delay(self):
+        """Test that a Retry-After header raises the delay to its value."""
+        response = {'ResponseMetadata': {'HTTPHeaders': {'retry-after': '5'}}}
+        assert _retry_delay(0.1, 0, response) == 5.0
+    
+    def test_retry_after_capped_at_max_delay(self):
+        """Test that a long Retry-After is capped at the maximum delay."""
+        response = {'ResponseMetadata': {'HTTPHeaders': {'retry-after': '600'}}}
+        assert _retry_delay(1.0, 0, response) == MAX_RETRY_DELAY_SECONDS
+    
+    def test_retry_after_http_date_ignored(self):
+        """Test that an HTTP-date Retry-After falls back to the jittered delay."""
+        response = {'ResponseMetadata': {'HTTPHeaders': {
+            'retry-after': 'Wed, 21 Oct 2015 07:28:00 GMT'
+        }}}
+        assert 0 <= _retry_delay(1.0, 0, response) <= 1.0
+
+
+class TestPublishRetryClassification:
+    """Test which PutMetricData failures are retried."""
+    
+    @staticmethod
+    def _client_error(code):
+        return ClientError({'Error': {'Code': code, 'Message': 'test'}}, 'PutMetricData')
+    
+    @pytest.mark.asyncio
+    async def test_retryable_code_retries_with_backoff(self, publisher):
+        """Test that throttling is retried up to the attempt limit."""
+        publisher._put_metric_data = AsyncMock(side_effect=self._client_error('Throttling'))
+        
+        with patch('asyncio.sleep', new_callable=AsyncMock) as mock_sleep:
+            await publisher._publish_single_batch([MetricDatum("Sent", 1.0, "Count")])
+        
+        assert publisher._put_metric_data.call_count == 3
+        assert mock_sleep.call_count == 2
+    
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("code", ["InvalidParameterValue", "AccessDenied"])
+    async def test_non_retryable_code_fails_fast(self, publisher, code):
+        """Test that validation and permission errors are not retried."""
+        publisher._put_metric_data = AsyncMock(side_effect=self._client_error(code))
+        
+        with patch('asyncio.sleep', new_callable=AsyncMock) as mock_sleep:
+            await publisher._publish_single_batch([MetricDatum("Sent", 1.0, "Count")])
+        
+        assert publisher._put_metric_data.call_count == 1
+        mock_sleep.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_unexpected_exception_fails_fast(self, publisher):
+        """Test that non-transport exceptions are not retried."""
+        publisher._put_metric_data = AsyncMock(side_effect=ValueError("bad metric"))
+        
+        with patch('asyncio.sleep', new_callable=AsyncMock) as mock_sleep:
+            await publisher._publish_single_batch([MetricDatum("Sent", 1.0, "Count")])
+        
+        assert publisher._put_metric_data.call_count == 1
+        mock_sleep.assert_not_called()
+
+
+class TestIdleHeartbeat:
+    """Test skipping of idle producer windows."""
+    
+    @pytest.mark.asyncio
+    async def test_heartbeat_on_every_sixth_idle_window(self, publisher):
+        """Test that idle windows 1, 7, 13, ... are published and the rest skipped."""
+        published = []
+        for window in range(1, 2 * IDLE_HEARTBEAT_WINDOWS + 2):
+            buffered = len(publisher.metrics_buffer)
+            await publisher.publish_producer_metrics(ProducerMetrics(), demo_phase=1)
+            if len(publisher.metrics_buffer) > buffered:
+                published.append(window)
+        
+        assert published == [1, 1 + IDLE_HEARTBEAT_WINDOWS, 1 + 2 * IDLE_HEARTBEAT_WINDOWS]
+    
+    @pytest.mark.asyncio
+    async def test_activity_resets_idle_count(self, publisher, producer_metrics):
+        """Test that the first idle window after activity is published again."""
+        await publisher.publish_producer_metrics(ProducerMetrics(), demo_phase=1)
+        await publisher.publish_producer_metrics(producer_metrics, demo_phase=1)
+        
+        buffered = len(publisher.metrics_buffer)
+        await publisher.publish_producer_metrics(ProducerMetrics(), demo_phase=1)
+        
+        assert len(publisher.metrics_buffer) > buffered
+    
+    def test_is_idle_snapshot(self, publisher, producer_metrics):
+        """Test that only a window with no sends, batches, retries or throttles is idle."""
+        now = datetime.now(timezone.utc)
+        idle = publisher._create_metrics_snapshot(ProducerMetrics(), 1, now)
+        active = publisher._create_metrics_snapshot(producer_metrics, 1, now)
+        
+        assert CloudWatchMetricsPublisher._is_idle_snapshot(idle)
+        assert not CloudWatchMetricsPublisher._is_idle_snapshot(active)
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
\ No newline at end of file
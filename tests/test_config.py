@@ -22,7 +22,7 @@ class TestDemoConfig:
         assert config.baseline_tps == 100
         assert config.spike_tps == 10000
         assert config.peak_tps == 50000
-        assert config.phase_durations == [120, 120, 120, 120]
+        assert list(config.phase_durations) == [120, 120, 120, 120]
         assert config.per_task_capacity == 1000
         assert config.max_tasks == 100
         assert config.stream_name == "social-media-stream"
@@ -41,7 +41,7 @@ class TestDemoConfig:
         assert config.baseline_tps == 200
         assert config.spike_tps == 20000
         assert config.peak_tps == 100000
-        assert config.phase_durations == [60, 60, 60, 60]
+        assert list(config.phase_durations) == [60, 60, 60, 60]
         assert config.stream_name == "custom-stream"
     
     def test_invalid_phase_durations(self):
@@ -0,0 +1,133 @@
+"""
+Unit tests for the sentiment consumer's cache key and in-batch deduplication.
+"""
+
+import pytest
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda', 'sentiment-consumer'))
+
+from sentiment_analyzer import SentimentAnalyzer, _SENTIMENT_CACHE, _cache_key
+from models import SentimentResult, batch_timestamp
+
+
+def _post(post_id, content):
+    return SimpleNamespace(id=post_id, content=content)
+
+
+def _result(post_id, score):
+    sentiment = "positive" if score > 0 else "negative" if score < 0 else "neutral"
+    return SentimentResult.from_trusted(
+        post_id=post_id,
+        sentiment=sentiment,
+        sentiment_score=score,
+        confidence=1.0,
+        timestamp=batch_timestamp()
+    )
+
+
+@pytest.fixture(autouse=True)
+def clear_sentiment_cache():
+    """Start and end every test with an empty process-wide cache."""
+    _SENTIMENT_CACHE.clear()
+    yield
+    _SENTIMENT_CACHE.clear()
+
+
+class TestCacheKey:
+    """Test normalization of post text into cache keys."""
+
+    @pytest.mark.parametrize("variant", [
+        "Great service",
+        "RT: great service",
+        "@support great service",
+        "great service #123",
+        "great service ...",
+        "Great -- service !!",
+    ])
+    def test_near_duplicates_share_key(self, variant):
+        """Test that reposts, mentions, tags, punctuation and case are ignored."""
+        assert _cache_key(variant) == _cache_key("great service")
+
+    @pytest.mark.parametrize("first, second", [
+        ("great service 🙄", "great service 😀"),
+        ("great service 😀", "great service"),
+        ("great 👍", "great 👎"),
+        ("😡", "😍"),
+        ("great service", "terrible service"),
+    ])
+    def test_different_sentiment_keeps_distinct_keys(self, first, second):
+        """Test that emoji and words that change the sentiment stay in the key."""
+        assert _cache_key(first) != _cache_key(second)
+
+    def test_repost_with_emoji_shares_key(self):
+        """Test that a repost of an emoji post matches the original."""
+        assert _cache_key("RT: @bob Great service 😀") == _cache_key("great service 😀")
+
+
+class TestInBatchDeduplication:
+    """Test that repeated texts in a batch are scored once and fanned back out."""
+
+    @pytest.fixture(params=[True, False], ids=["cache", "no-cache"])
+    def analyzer(self, request):
+        return SentimentAnalyzer(bedrock_client=Mock(), use_cache=request.param)
+
+    def test_emoji_variants_are_scored_separately(self, analyzer):
+        """Test that posts differing only by emoji are each sent to Bedrock."""
+        posts = [
+            _post("p1", "great service 🙄"),
+            _post("p2", "great service 😀"),
+            _post("p3", "RT: Great service 😀"),
+        ]
+
+        results, pending, keys, duplicates = analyzer._resolve_cached(posts)
+
+        assert pending == [0, 1]
+        assert duplicates == [(2, 1)]
+        assert len(keys) == len(posts)
+        assert results == [None, None, None]
+
+        fresh_results = [_result("p1", -0.5), _result("p2", 0.8)]
+        analyzer._merge_fresh(results, pending, keys, fresh_results, posts, duplicates)
+
+        assert [r.post_id for r in results] == ["p1", "p2", "p3"]
+        assert [r.sentiment_score for r in results] == [-0.5, 0.8, 0.8]
+
+    def test_trivial_posts_are_not_deduplicated(self, analyzer):
+        """Test that empty and link-only posts are classified locally."""
+        posts = [_post("p1", ""), _post("p2", "https://example.com"), _post("p3", "")]
+
+        results, pending, keys, duplicates = analyzer._resolve_cached(posts)
+
+        assert pending == []
+        assert duplicates == []
+        assert [r.sentiment for r in results] == ["neutral"] * 3
+
+    def test_cache_keeps_emoji_variants_apart(self):
+        """Test that cached scores for emoji variants are not served for each other."""
+        analyzer = SentimentAnalyzer(bedrock_client=Mock(), use_cache=True)
+        posts = [_post("p1", "great service 🙄"), _post("p2", "great service 😀")]
+
+        results, pending, keys, duplicates = analyzer._resolve_cached(posts)
+        analyzer._merge_fresh(
+            results, pending, keys, [_result("p1", -0.5), _result("p2", 0.8)], posts, duplicates
+        )
+
+        later = [_post("p3", "great service 😀"), _post("p4", "great service 🙄")]
+        results, pending, _, _ = analyzer._resolve_cached(later)
+
+        assert pending == []
+        assert [r.sentiment_score for r in results] == [0.8, -0.5]
+
+    def test_disabled_cache_is_not_filled(self):
+        """Test that results are not stored when caching is disabled."""
+        analyzer = SentimentAnalyzer(bedrock_client=Mock(), use_cache=False)
+        posts = [_post("p1", "great service 😀")]
+
+        results, pending, keys, duplicates = analyzer._resolve_cached(posts)
+        analyzer._merge_fresh(results, pending, keys, [_result("p1", 0.8)], posts, duplicates)
+
+        assert len(_SENTIMENT_CACHE) == 0
@@ -2,6 +2,7 @@
 Unit tests for serialization utilities.
 """
 
+import json
 import pytest
 import sys
 import os
@@ -17,7 +18,7 @@ from shared.serialization import (
     serialize_to_json, deserialize_from_json,
     serialize_to_bytes, deserialize_from_bytes,
     post_to_json, post_from_json,
-    post_to_bytes, post_from_bytes,
+    post_to_bytes, post_from_bytes, post_from_dict,
     metrics_to_json, metrics_from_json
 )
 
@@ -68,6 +69,18 @@ class TestSerialization:
         deserialized_post = post_from_bytes(json_bytes)
         assert deserialized_post.content == post.content
     
+    def test_post_from_dict(self):
+        """Test building a post from an already-decoded JSON dictionary."""
+        location = GeoLocation(51.5074, -0.1278, "London", "UK")
+        post = SocialMediaPost(content="Dict post", location=location, post_type=PostType.REPLY)
+        
+        data = json.loads(post_to_bytes(post))
+        deserialized_post = post_from_dict(data)
+        assert deserialized_post.content == post.content
+        assert deserialized_post.post_type == PostType.REPLY
+        assert deserialized_post.location == location
+        assert deserialized_post.timestamp == post.timestamp
+    
     def test_demo_metrics_serialization(self):
         """Test DemoMetrics serialization round-trip."""
         original_metrics = DemoMetrics(